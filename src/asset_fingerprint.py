@@ -0,0 +1,102 @@
+import json
+import os
+from build_manifest import hash_bytes, hash_file
+from atomic_file import atomic_write
+from copy_directory import sync_file
+
+# Written into every output directory: {"index.css": "index.<hash>.css", ...}
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+# Hex digits of the content hash kept in fingerprinted names.
+HASH_LENGTH = 10
+
+def fingerprint_name(rel_path: str, digest: str) -> str:
+    """Inserts the content hash before the extension: "images/tom.png" -> "images/tom.<hash>.png"."""
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+def build_asset_map(static_dir: str, replacements=None) -> dict:
+    """
+    Returns {rel_path: fingerprinted_rel_path} for every file under
+    `static_dir`, with '/' separators so the keys match URL paths.
+    `replacements` maps relative paths to a file shipped in place of the
+    source one (as for write_fingerprinted); the name is derived from the
+    bytes actually shipped, so it always pins the same content.
+    """
+    replacements = {os.path.normpath(rel): path for rel, path in (replacements or {}).items()}
+    assets = {}
+    for dirpath, dirnames, filenames in os.walk(static_dir):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            rel = os.path.relpath(path, static_dir)
+            shipped = replacements.get(os.path.normpath(rel)) or path
+            rel = rel.replace(os.sep, "/")
+            assets[rel] = fingerprint_name(rel, hash_file(shipped))
+    return dict(sorted(assets.items()))
+
+def assets_digest(assets: dict) -> str:
+    """Returns a hash identifying an asset map, for build manifests and caches."""
+    return hash_bytes(json.dumps(assets, sort_keys=True).encode("utf-8"))
+
+def write_fingerprinted(static_dir: str, output_dir: str, assets: dict, link: bool = False,
+                        replacements=None) -> list[str]:
+    """
+    Copies every asset in `assets` to its fingerprinted name under
+    `output_dir` and writes the asset manifest next to them. A fingerprinted
+    file that already exists is skipped, since its name pins its content.
+    `replacements` maps asset paths to a file shipped in place of the
+    source one, as for sync_directory. Returns the relative paths of the
+    files written.
+    """
+    replacements = replacements or {}
+    written = []
+    for rel, hashed in assets.items():
+        dst = os.path.join(output_dir, hashed)
+        if not os.path.exists(dst):
+            src = replacements.get(os.path.normpath(rel)) or os.path.join(static_dir, rel)
+            sync_file(src, dst, link=link)
+            written.append(hashed)
+    with atomic_write(os.path.join(output_dir, ASSET_MANIFEST_NAME)) as f:
+        json.dump(assets, f, indent=1, sort_keys=True)
+    return written
+
+class AssetRewriter:
+    """
+    Stands in for a basepath string when rendering (HTMLNode.iter_html,
+    CompiledTemplate.for_basepath, ...). Those join HTML parts split at
+    root-relative URLs with the basepath; this join also swaps every URL
+    naming an asset for its fingerprinted name, keeping any ?query or
+    #fragment. Only URLs are inspected, so the cost is O(links).
+    """
+
+    def __init__(self, basepath: str, assets: dict):
+        self.basepath = basepath
+        self.assets = assets
+        self.digest = assets_digest(assets)
+
+    def join(self, parts) -> str:
+        if len(parts) == 1:
+            return parts[0]
+        out = [parts[0]]
+        for part in parts[1:]:
+            out.append(self.basepath)
+            end = part.find('"')
+            if end == -1:
+                end = len(part)
+            for sep in "?#":
+                cut = part.find(sep, 0, end)
+                if cut != -1:
+                    end = cut
+            hashed = self.assets.get(part[:end])
+            out.append(part if hashed is None else hashed + part[end:])
+        return "".join(out)
+
+    def __eq__(self, other):
+        if not isinstance(other, AssetRewriter):
+            return NotImplemented
+        return self.basepath == other.basepath and self.digest == other.digest
+
+    def __hash__(self):
+        return hash((self.basepath, self.digest))
+
+    def __repr__(self):
+        return f"AssetRewriter({self.basepath!r}, {len(self.assets)} assets)"
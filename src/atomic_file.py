@@ -0,0 +1,28 @@
+import os
+from contextlib import contextmanager
+
+def temp_path(path: str) -> str:
+    """Returns the temporary name `path` is written under, unique per process so concurrent workers never collide."""
+    return f"{path}.{os.getpid()}.tmp"
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: str = None):
+    """
+    Opens a temporary file next to `path` for writing (see temp_path) and
+    yields it. When the block finishes, the file atomically replaces
+    `path`, so neither readers nor a crash ever see it half written; if the
+    block raises, the temporary file is removed and `path` is left as it
+    was. Missing parent directories are created.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,219 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from markdown_blocks import markdown_to_blocks, block_to_block_type, markdown_to_html_node
+from splitnodes import text_to_text_node
+from page_template import CompiledTemplate
+from generation_tools import write_page
+
+WORDS = (
+    "elf ring shire hobbit wizard mountain river forest tower road king shadow "
+    "light song sword stone council fellowship journey dragon gold star moon "
+    "ancient hidden silver green quiet bright long swift"
+).split()
+
+DEFAULT_TEMPLATE = (
+    '<!doctype html>\n<html>\n  <head>\n    <meta charset="utf-8" />\n'
+    '    <title>{{ Title }}</title>\n    <link href="/index.css" rel="stylesheet" />\n'
+    '  </head>\n  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>'
+)
+
+STAGES = (
+    "markdown_to_blocks",
+    "block_to_block_type",
+    "text_to_text_node",
+    "markdown_to_html_node",
+    "to_html",
+    "template_fill",
+    "disk_write",
+    "disk_rewrite",
+)
+
+def _inline_text(rng, words, link_density, image_density, format_density):
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < link_density:
+            word = f"[{word}](/blog/{rng.choice(WORDS)})"
+        elif roll < link_density + image_density:
+            word = f"![{word}](/images/{rng.choice(WORDS)}.png)"
+        elif roll < link_density + image_density + format_density:
+            word = rng.choice(("**{}**", "_{}_", "`{}`")).format(word)
+        parts.append(word)
+    return " ".join(parts)
+
+def generate_page_markdown(rng, blocks=20, paragraph_words=60, link_density=0.02,
+                           image_density=0.005, format_density=0.05, list_ratio=0.15,
+                           code_ratio=0.05, quote_ratio=0.05):
+    """Returns one synthetic markdown page starting with an H1 title."""
+    def inline(words):
+        return _inline_text(rng, words, link_density, image_density, format_density)
+
+    out = [f"# {inline(5)}"]
+    for _ in range(blocks):
+        roll = rng.random()
+        if roll < list_ratio:
+            items = rng.randint(2, 8)
+            if rng.random() < 0.5:
+                out.append("\n".join(f"- {inline(8)}" for _ in range(items)))
+            else:
+                out.append("\n".join(f"{i + 1}. {inline(8)}" for i in range(items)))
+        elif roll < list_ratio + code_ratio:
+            lines = "\n".join(" ".join(rng.choice(WORDS) for _ in range(6)) for _ in range(rng.randint(2, 10)))
+            out.append(f"```\n{lines}\n```")
+        elif roll < list_ratio + code_ratio + quote_ratio:
+            out.append("\n".join(f"> {inline(10)}" for _ in range(rng.randint(1, 3))))
+        elif rng.random() < 0.1:
+            out.append(f"{'#' * rng.randint(2, 4)} {inline(4)}")
+        else:
+            # wrap paragraphs over several lines like hand-written markdown
+            text = inline(paragraph_words).split(" ")
+            out.append("\n".join(" ".join(text[i:i + 12]) for i in range(0, len(text), 12)))
+    return "\n\n".join(out) + "\n"
+
+def generate_corpus(pages=100, seed=0, **shape):
+    """
+    Returns a list of (relative_path, markdown) pairs for a synthetic site.
+    The same arguments always produce the same corpus. `shape` is passed to
+    generate_page_markdown (blocks, paragraph_words, link/image/format
+    density and list/code/quote ratios).
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(pages):
+        path = os.path.join("blog", f"post{i:05d}", "index.md")
+        corpus.append((path, generate_page_markdown(rng, **shape)))
+    return corpus
+
+def _collapse(block):
+    return " ".join(line.strip() for line in block.splitlines())
+
+def time_corpus(corpus, template_text=DEFAULT_TEMPLATE, out_dir=None):
+    """
+    Runs every stage of the pipeline over `corpus` once and returns the total
+    wall time per stage in seconds. Stages are timed in isolation on the same
+    inputs, so markdown_to_html_node includes the cost of the three parsing
+    stages before it. The template fill and the writes go through the same
+    calls as a build (iter_render_bytes, write_page); "disk_rewrite" writes
+    each page again, timing the compare that leaves an identical file alone.
+    """
+    totals = dict.fromkeys(STAGES, 0)
+    clock = time.perf_counter_ns
+    template = CompiledTemplate(template_text)
+    # write_page logs every page like a build does; keep that off the report
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        out_dir = out_dir or tmp
+        for path, markdown in corpus:
+            t0 = clock()
+            blocks = markdown_to_blocks(markdown)
+            t1 = clock()
+            for block in blocks:
+                block_to_block_type(block)
+            t2 = clock()
+            totals["markdown_to_blocks"] += t1 - t0
+            totals["block_to_block_type"] += t2 - t1
+
+            texts = [_collapse(block) for block in blocks if not block.startswith("```")]
+            t0 = clock()
+            for text in texts:
+                text_to_text_node(text)
+            totals["text_to_text_node"] += clock() - t0
+
+            t0 = clock()
+            node = markdown_to_html_node(markdown)
+            t1 = clock()
+            html = node.to_html()
+            t2 = clock()
+            page = b"".join(template.iter_render_bytes(Title=path, Content=html))
+            t3 = clock()
+            dest = os.path.join(out_dir, path[:-3] + ".html")
+            write_page(dest, page)
+            t4 = clock()
+            write_page(dest, page)
+            t5 = clock()
+            totals["markdown_to_html_node"] += t1 - t0
+            totals["to_html"] += t2 - t1
+            totals["template_fill"] += t3 - t2
+            totals["disk_write"] += t4 - t3
+            totals["disk_rewrite"] += t5 - t4
+    return {stage: ns / 1e9 for stage, ns in totals.items()}
+
+def run_benchmark(corpus, repeat=5, template_text=DEFAULT_TEMPLATE):
+    """
+    Times the corpus `repeat` times and returns per-stage statistics
+    (min, median and max seconds) plus corpus size information.
+    """
+    runs = [time_corpus(corpus, template_text) for _ in range(repeat)]
+    stages = {
+        stage: {
+            "min": min(run[stage] for run in runs),
+            "median": statistics.median(run[stage] for run in runs),
+            "max": max(run[stage] for run in runs),
+        }
+        for stage in STAGES
+    }
+    return {
+        "pages": len(corpus),
+        "bytes": sum(len(md.encode("utf-8")) for _, md in corpus),
+        "repeat": repeat,
+        "stages": stages,
+    }
+
+def format_report(result) -> str:
+    lines = [
+        f"{result['pages']} pages, {result['bytes'] / 1e6:.2f} MB markdown, best of {result['repeat']} runs",
+        f"{'stage':<24}{'min ms':>12}{'median ms':>12}{'us/page':>12}",
+    ]
+    for stage, stats in result["stages"].items():
+        per_page = stats["min"] / max(result["pages"], 1) * 1e6
+        lines.append(f"{stage:<24}{stats['min'] * 1e3:>12.2f}{stats['median'] * 1e3:>12.2f}{per_page:>12.1f}")
+    return "\n".join(lines)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the site generator on a synthetic corpus.")
+    parser.add_argument('--pages', type=int, default=200, help="number of pages to generate")
+    parser.add_argument('--blocks', type=int, default=20, help="blocks per page")
+    parser.add_argument('--paragraph-words', type=int, default=60, help="words per paragraph")
+    parser.add_argument('--link-density', type=float, default=0.02, help="fraction of words that are links")
+    parser.add_argument('--image-density', type=float, default=0.005, help="fraction of words that are images")
+    parser.add_argument('--format-density', type=float, default=0.05, help="fraction of words with bold/italic/code")
+    parser.add_argument('--list-ratio', type=float, default=0.15, help="fraction of blocks that are lists")
+    parser.add_argument('--code-ratio', type=float, default=0.05, help="fraction of blocks that are code blocks")
+    parser.add_argument('--quote-ratio', type=float, default=0.05, help="fraction of blocks that are quotes")
+    parser.add_argument('--seed', type=int, default=0, help="corpus random seed")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per stage")
+    parser.add_argument('--json', metavar='PATH', help="also write the results as JSON to PATH")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    corpus = generate_corpus(
+        pages=args.pages,
+        seed=args.seed,
+        blocks=args.blocks,
+        paragraph_words=args.paragraph_words,
+        link_density=args.link_density,
+        image_density=args.image_density,
+        format_density=args.format_density,
+        list_ratio=args.list_ratio,
+        code_ratio=args.code_ratio,
+        quote_ratio=args.quote_ratio,
+    )
+    result = run_benchmark(corpus, repeat=args.repeat)
+    result["args"] = vars(args)
+    print(format_report(result))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+from atomic_file import atomic_write
+
+# Bump this whenever a change to the generator can alter the rendered output
+# for unchanged inputs, so every page is rebuilt once after upgrading.
+MANIFEST_VERSION = 3
+
+
+def hash_bytes(data: bytes) -> str:
+    """Returns the hex sha256 digest of `data`."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """Returns the hex sha256 digest of the file at `path`, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Persistent record of the inputs and output of every generated page.
+
+    Entries are keyed by source path and store the source hash, template hash,
+    basepath, destination path and output hash of the last successful build.
+    A page whose inputs all match its entry, and whose output file still has
+    the recorded hash, does not need to be generated again.
+    """
+
+    def __init__(self, path: str, entries: dict = None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, path: str) -> "BuildManifest":
+        """
+        Loads the manifest at `path`. A missing, unreadable or outdated
+        manifest yields an empty one, which makes the next build a full build.
+        """
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        entries = data.get("pages")
+        if not isinstance(entries, dict):
+            return cls(path)
+        return cls(path, entries)
+
+    def save(self):
+        """Writes the manifest to disk, replacing the previous file atomically."""
+        with atomic_write(self.path) as f:
+            json.dump({"version": MANIFEST_VERSION, "pages": self.entries}, f, indent=1, sort_keys=True)
+
+    def is_fresh(self, source: str, dest: str, source_hash: str, template_hash: str, basepath: str) -> bool:
+        """
+        Returns True if `source` was last built to `dest` from identical inputs
+        and the output on disk is still the one that build produced.
+        """
+        entry = self.entries.get(source)
+        if entry is None:
+            return False
+        if (entry.get("dest") != dest or
+                entry.get("source_hash") != source_hash or
+                entry.get("template_hash") != template_hash or
+                entry.get("basepath") != basepath):
+            return False
+        if not os.path.isfile(dest):
+            return False
+        return hash_file(dest) == entry.get("output_hash")
+
+    def record(self, source: str, dest: str, source_hash: str, template_hash: str, basepath: str, output_hash: str):
+        """Stores the inputs and output hash of a freshly generated page."""
+        self.entries[source] = {
+            "dest": dest,
+            "source_hash": source_hash,
+            "template_hash": template_hash,
+            "basepath": basepath,
+            "output_hash": output_hash,
+        }
+
+    def prune(self, current_sources) -> list[str]:
+        """
+        Forgets every source that is not in `current_sources` and returns the
+        destination paths that were generated from them, so the caller can
+        delete outputs whose sources disappeared.
+        """
+        current = set(current_sources)
+        return self.forget(source for source in self.entries if source not in current)
+
+    def forget(self, sources) -> list[str]:
+        """Removes the entries for `sources` and returns their destination paths."""
+        return [self.entries.pop(source)["dest"] for source in sorted(sources) if source in self.entries]
@@ -1,5 +1,12 @@
 import os
 import shutil
+from build_manifest import hash_file
+from atomic_file import temp_path
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
 
 # A recursive function that copies all the contents from a source directory to a destination directory.
 # first it deletes the contents of the destination directory if it exists.
@@ -32,3 +39,164 @@ def copy_directory(source: str, destination: str):
 # Assuming you have a 'my_source_folder' with files/subfolders
 # and you want to copy them to 'my_destination_folder'
 # copy_directory('path/to/source', 'path/to/destination')
+
+# ioctl request for cloning a whole file (reflink) on Linux btrfs/xfs/bcachefs.
+FICLONE = 0x40049409
+
+def _clone_or_copy(fsrc, fdst) -> str:
+    """
+    Copies the open file `fsrc` into the empty open file `fdst` using the
+    cheapest mechanism the filesystem supports: a reflink, then an in-kernel
+    os.copy_file_range, then a plain buffered copy. Returns the method used.
+    """
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return "reflink"
+        except OSError:
+            pass
+    if hasattr(os, "copy_file_range"):
+        try:
+            while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                pass
+            return "copy_file_range"
+        except OSError:
+            # e.g. EXDEV on older kernels; restart with a plain copy
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+    shutil.copyfileobj(fsrc, fdst, 1 << 20)
+    return "copy"
+
+def _copy_file(src: str, dst: str, link: bool = False) -> str:
+    """
+    Replaces `dst` with the contents of `src` atomically (via a temporary file
+    and os.replace) and preserves the source mtime so later syncs can compare
+    size/mtime. With `link=True`, a hardlink is tried first. Returns the
+    method used.
+    """
+    tmp = temp_path(dst)
+    if link:
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dst)
+            return "hardlink"
+        except OSError:
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+    with open(src, 'rb') as fsrc, open(tmp, 'wb') as fdst:
+        method = _clone_or_copy(fsrc, fdst)
+    shutil.copystat(src, tmp)
+    os.replace(tmp, dst)
+    return method
+
+def _is_unchanged(src: str, dst: str, checksum: bool) -> bool:
+    """Returns True if `dst` already holds the same file as `src`."""
+    try:
+        src_st = os.stat(src)
+        dst_st = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    if not os.path.isfile(dst):
+        return False
+    if (src_st.st_dev, src_st.st_ino) == (dst_st.st_dev, dst_st.st_ino):
+        return True  # hardlinked by a previous sync
+    if src_st.st_size != dst_st.st_size:
+        return False
+    if checksum:
+        return hash_file(src) == hash_file(dst)
+    return src_st.st_mtime_ns == dst_st.st_mtime_ns
+
+def _remove_path(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+def sync_directory(source: str, destination: str, keep=(), checksum: bool = False, link: bool = False,
+                   keep_suffixes=(), replacements=None) -> dict:
+    """
+    Incrementally mirrors `source` into `destination`.
+
+    Files whose size and mtime (or, with `checksum=True`, content hash) match
+    are left alone; new or changed files are copied, and files in the
+    destination that no longer exist in the source are deleted. Paths in
+    `keep` (relative to `destination`, e.g. generated pages) are never
+    deleted. Files derived from a kept or source file by appending one of
+    `keep_suffixes` (e.g. ".gz" sidecars) are kept as well. `replacements`
+    maps relative paths to a file shipped in place of the source one (e.g.
+    an optimized image). Only the files that actually changed are logged.
+
+    Returns a dict with the relative paths that were "copied" (of which
+    "added" did not exist before) and "deleted", and the number of
+    "unchanged" files.
+    """
+    print(f"Syncing '{source}' to '{destination}'...")
+    keep = {os.path.normpath(p) for p in keep}
+    replacements = {os.path.normpath(rel): path for rel, path in (replacements or {}).items()}
+    copied, added, deleted = [], [], []
+    unchanged = 0
+    source_files = set()
+
+    for dirpath, dirnames, filenames in os.walk(source):
+        rel_dir = os.path.relpath(dirpath, source)
+        dest_dir = os.path.normpath(os.path.join(destination, rel_dir))
+        if os.path.lexists(dest_dir) and not os.path.isdir(dest_dir):
+            os.remove(dest_dir)
+        os.makedirs(dest_dir, exist_ok=True)
+        for filename in filenames:
+            rel = os.path.normpath(os.path.join(rel_dir, filename))
+            source_files.add(rel)
+            src = replacements.get(rel) or os.path.join(source, rel)
+            dst = os.path.join(destination, rel)
+            if _is_unchanged(src, dst, checksum):
+                unchanged += 1
+                continue
+            if not os.path.isfile(dst):
+                added.append(rel)
+            if os.path.isdir(dst) and not os.path.islink(dst):
+                shutil.rmtree(dst)
+            method = _copy_file(src, dst, link=link)
+            copied.append(rel)
+            print(f"Copied ({method}): {dst}")
+
+    # delete files that disappeared from the source, bottom-up so emptied
+    # directories can be removed as well
+    for dirpath, dirnames, filenames in os.walk(destination, topdown=False):
+        rel_dir = os.path.relpath(dirpath, destination)
+        for filename in filenames:
+            rel = os.path.normpath(os.path.join(rel_dir, filename))
+            if rel in source_files or rel in keep:
+                continue
+            base, ext = os.path.splitext(rel)
+            if ext in keep_suffixes and (base in source_files or base in keep):
+                continue
+            _remove_path(os.path.join(dirpath, filename))
+            deleted.append(rel)
+            print(f"Deleted: {os.path.join(dirpath, filename)}")
+        if rel_dir != "." and not os.listdir(dirpath) and not os.path.isdir(os.path.join(source, rel_dir)):
+            os.rmdir(dirpath)
+
+    print(f"Sync complete: {len(copied)} copied, {len(deleted)} deleted, {unchanged} unchanged.")
+    return {"copied": sorted(copied), "added": sorted(added), "deleted": sorted(deleted), "unchanged": unchanged}
+
+def sync_file(source: str, destination: str, checksum: bool = False, link: bool = False) -> bool:
+    """
+    Brings a single destination path in line with `source`: copies it if new
+    or changed, or deletes the destination if the source no longer exists.
+    Returns True if anything was written or removed.
+    """
+    if not os.path.exists(source):
+        if not os.path.lexists(destination):
+            return False
+        _remove_path(destination)
+        print(f"Deleted: {destination}")
+        return True
+    if _is_unchanged(source, destination, checksum):
+        return False
+    dest_dir = os.path.dirname(destination)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    method = _copy_file(source, destination, link=link)
+    print(f"Copied ({method}): {destination}")
+    return True
@@ -0,0 +1,119 @@
+import json
+import os
+from build_manifest import hash_file
+from atomic_file import atomic_write
+
+DEPLOY_MANIFEST_VERSION = 1
+ADDED, MODIFIED, DELETED = "added", "modified", "deleted"
+
+
+class DeployManifest:
+    """
+    The files one build added, modified or deleted in an output directory,
+    so deploy tooling can upload just the delta instead of diffing the
+    whole tree against the bucket.
+
+    Changes are recorded as they happen (by full path) and written by save()
+    as {"version", "output_dir", "basepath", "files": [{"path", "size",
+    "hash", "status"}], "deleted": [paths]}, with paths relative to the
+    output directory and '/' separators. Only changed files are hashed, so
+    the cost is O(changes).
+    """
+
+    def __init__(self, output_dir: str, basepath: str = "/"):
+        self.output_dir = output_dir
+        self.basepath = basepath
+        self.changes = {}
+        self.hashes = {}
+
+    def record(self, path: str, status: str, output_hash: str = None):
+        """
+        Records that `path` (under the output directory) was added, modified
+        or deleted. Several changes to one path in a build collapse into one:
+        e.g. deleted then added is a modification, added then deleted is
+        dropped. `output_hash` saves re-reading a file whose hash is known.
+        """
+        previous = self.changes.get(path)
+        if previous == ADDED and status == MODIFIED:
+            status = ADDED
+        elif previous == DELETED and status == ADDED:
+            status = MODIFIED
+        elif previous == ADDED and status == DELETED:
+            del self.changes[path]
+            self.hashes.pop(path, None)
+            return
+        self.changes[path] = status
+        if output_hash is not None and status != DELETED:
+            self.hashes[path] = output_hash
+        else:
+            self.hashes.pop(path, None)
+
+    def record_stamp_changes(self, paths, stamps: dict) -> dict:
+        """
+        Records as modified every path in `paths` whose (size, mtime) differs
+        from its entry in `stamps`, the stamps from the previous build keyed
+        by path relative to the output directory. This catches content that
+        changed without being copied, e.g. a static file hardlinked into the
+        output (--link-static) and edited in place. Paths without a previous
+        stamp are left to the other records. Returns the current stamps.
+        """
+        current = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            rel = self._rel(path)
+            current[rel] = [st.st_size, st.st_mtime_ns]
+            previous = stamps.get(rel)
+            if previous is not None and previous != current[rel] and path not in self.changes:
+                self.record(path, MODIFIED)
+        return current
+
+    def changed_paths(self) -> list[str]:
+        """Returns the added and modified paths, sorted."""
+        return sorted(path for path, status in self.changes.items() if status != DELETED)
+
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(path, self.output_dir).replace(os.sep, "/")
+
+    def to_dict(self) -> dict:
+        files = []
+        for path in self.changed_paths():
+            if not os.path.isfile(path):
+                continue
+            files.append({
+                "path": self._rel(path),
+                "size": os.path.getsize(path),
+                "hash": self.hashes.get(path) or hash_file(path),
+                "status": self.changes[path],
+            })
+        deleted = sorted(self._rel(path) for path, status in self.changes.items() if status == DELETED)
+        return {
+            "version": DEPLOY_MANIFEST_VERSION,
+            "output_dir": self.output_dir,
+            "basepath": self.basepath,
+            "files": files,
+            "deleted": deleted,
+        }
+
+    def save(self, path: str) -> dict:
+        """Writes the manifest to `path` atomically and returns its contents."""
+        data = self.to_dict()
+        with atomic_write(path) as f:
+            json.dump(data, f, indent=1)
+        return data
+
+
+def load_stamps(path: str) -> dict:
+    """Returns the file stamps saved by save_stamps, or {} if missing or unreadable."""
+    try:
+        with open(path, 'r') as f:
+            stamps = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return stamps if isinstance(stamps, dict) else {}
+
+def save_stamps(path: str, stamps: dict):
+    with atomic_write(path) as f:
+        json.dump(stamps, f, separators=(",", ":"), sort_keys=True)
@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Sidecar suffix per Content-Encoding, in order of preference.
+ENCODINGS = (("zstd", ".zst"), ("gzip", ".gz"))
+
+def accepted_encodings(header: str) -> set:
+    """Parses an Accept-Encoding header into the set of codings with a non-zero q value."""
+    accepted = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+class PrecompressedHandler(SimpleHTTPRequestHandler):
+    """
+    Static file handler that answers with a precompressed .zst or .gz
+    sidecar (written by --precompress) when the client accepts that
+    encoding, and falls back to the plain file otherwise.
+    """
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if os.path.isfile(path):
+            accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+            for encoding, suffix in ENCODINGS:
+                if encoding in accepted and os.path.isfile(path + suffix):
+                    return self._send_sidecar(path, path + suffix, encoding)
+        return super().send_head()
+
+    def _send_sidecar(self, path, sidecar, encoding):
+        try:
+            f = open(sidecar, 'rb')
+        except OSError:
+            return super().send_head()
+        try:
+            st = os.fstat(f.fileno())
+            self.send_response(200)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(st.st_size))
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+            self.end_headers()
+            return f
+        except Exception:
+            f.close()
+            raise
+
+def serve(directory: str, port: int = 8888, bind: str = ""):
+    handler = partial(PrecompressedHandler, directory=directory)
+    with ThreadingHTTPServer((bind, port), handler) as httpd:
+        print(f"Serving {directory}/ on http://localhost:{httpd.server_address[1]}/ (precompressed sidecars enabled)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopped serving.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the generated site, preferring precompressed sidecars.")
+    parser.add_argument('--directory', '-d', default='docs', help="directory to serve (default: docs)")
+    parser.add_argument('--port', '-p', type=int, default=8888, help="port to listen on (default: 8888)")
+    parser.add_argument('--bind', '-b', default="", help="address to bind to (default: all interfaces)")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    serve(args.directory, args.port, args.bind)
+
+if __name__ == "__main__":
+    main()
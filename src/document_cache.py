@@ -0,0 +1,58 @@
+import hashlib
+import json
+import os
+import zlib
+from atomic_file import atomic_write
+
+# Bump this whenever a change to markdown parsing or rendering can alter the
+# content HTML of an unchanged source, so stale documents are never reused.
+PARSER_VERSION = 2
+
+class DocumentCache:
+    """
+    On-disk cache of parsed pages: the title and rendered content HTML (as
+    the basepath-independent parts from htmlnode.html_parts) of a markdown
+    source, keyed by a hash of the parser version and the source text.
+
+    Because the template and basepath are applied after the content is
+    rendered, builds where only those changed can skip parsing entirely and
+    redo just the template fill. Entries are zlib-compressed JSON and
+    written atomically, so several worker
+    processes can share one directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(markdown: str, variant: str = "") -> str:
+        """`variant` describes rendering options (see markdown_blocks.render_variant)."""
+        digest = hashlib.sha256(f"{PARSER_VERSION}\0{variant}\0".encode("utf-8"))
+        digest.update(markdown.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:] + ".z")
+
+    def get(self, key: str, count: bool = True):
+        """
+        Returns (title, content_parts) for `key`, or None on a miss; with
+        `count=False` the lookup is left out of the stats (see FragmentCache.get).
+        """
+        try:
+            with open(self._path(key), 'rb') as f:
+                title, parts = json.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, ValueError, TypeError):
+            self.misses += count
+            return None
+        self.hits += count
+        return title, tuple(parts)
+
+    def put(self, key: str, title: str, parts):
+        with atomic_write(self._path(key), 'wb') as f:
+            f.write(zlib.compress(json.dumps([title, list(parts)]).encode("utf-8")))
+
+    def stats(self) -> dict:
+        return {"doc_hits": self.hits, "doc_misses": self.misses}
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from atomic_file import atomic_write
+
+# Bump this whenever a change to block parsing or rendering can alter the
+# HTML produced for an unchanged block, so stale fragments are never reused.
+CACHE_VERSION = 2
+
+def _size(parts) -> int:
+    return sum(len(part) for part in parts)
+
+class FragmentCache:
+    """
+    Cache of rendered HTML fragments for markdown blocks, shared by every page
+    of a build.
+
+    Fragments are keyed by a hash of the block type and block text and stored
+    as the basepath-independent parts from htmlnode.html_parts. The
+    in-memory tier is an LRU capped at `max_bytes` (measured in characters of
+    cached HTML); the least recently used fragments are evicted first. If
+    `directory` is given, fragments are also written to an on-disk store
+    (one file per key, written atomically), so worker processes and later
+    builds can reuse each other's work.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, directory: str = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(block: str, block_type, variant: str = "") -> str:
+        """
+        Returns the cache key for a block of the given BlockType; `variant`
+        describes rendering options (see markdown_blocks.render_variant).
+        """
+        digest = hashlib.sha256(f"{CACHE_VERSION}\0{block_type.value}\0{variant}\0".encode("utf-8"))
+        digest.update(block.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:] + ".json")
+
+    def get(self, key: str, count: bool = True):
+        """
+        Returns the cached fragment parts for `key`, or None on a miss. With
+        `count=False` the lookup is left out of the stats, for entries that
+        only accompany a counted one (such as a block's search text).
+        """
+        parts = self.entries.get(key)
+        if parts is not None:
+            self.entries.move_to_end(key)
+            self.hits += count
+            return parts
+        if self.directory is not None:
+            try:
+                with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                    parts = tuple(json.load(f))
+            except (OSError, ValueError):
+                parts = None
+            if parts is not None:
+                self._remember(key, parts)
+                self.hits += count
+                self.disk_hits += count
+                return parts
+        self.misses += count
+        return None
+
+    def put(self, key: str, parts):
+        """Stores a rendered fragment's parts in memory and, if configured, on disk."""
+        parts = tuple(parts)
+        self._remember(key, parts)
+        if self.directory is not None:
+            with atomic_write(self._disk_path(key), encoding='utf-8') as f:
+                json.dump(parts, f)
+
+    def _remember(self, key: str, parts: tuple):
+        if key in self.entries:
+            self.size -= _size(self.entries.pop(key))
+        size = _size(parts)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = parts
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= _size(evicted)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+def format_cache_stats(stats: dict) -> str:
+    """Formats counters from FragmentCache.stats() (possibly summed over workers) for the build log."""
+    lookups = stats["hits"] + stats["misses"]
+    rate = 100 * stats["hits"] / lookups if lookups else 0.0
+    return (f"Block cache: {stats['hits']} hits ({stats['disk_hits']} from disk), "
+            f"{stats['misses']} misses, {rate:.1f}% hit rate, {stats['evictions']} evictions.")
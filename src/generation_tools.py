@@ -1,5 +1,24 @@
+import hashlib
+import mmap
 import os
-from markdown_blocks import markdown_to_html_node
+import time
+from contextlib import ExitStack, nullcontext
+from markdown_blocks import markdown_to_html_node, iter_markdown_html, iter_lines, render_variant, TEXT_VARIANT
+from htmlnode import html_parts
+from asset_fingerprint import AssetRewriter
+from atomic_file import atomic_write
+from page_template import load_template
+
+# Sources larger than this are memory-mapped and parsed block by block
+# instead of being read into one string.
+STREAM_THRESHOLD = 8 * 1024 * 1024
+
+class PageGenerationError(Exception):
+    """Raised when a page fails to generate; names the offending source file."""
+    def __init__(self, from_path, cause):
+        super().__init__(f"Failed to generate page from {from_path}: {cause}")
+        self.from_path = from_path
+        self.cause = cause
 
 def extract_title(markdown: str) -> str:
     """
@@ -7,8 +26,18 @@ def extract_title(markdown: str) -> str:
     Returns the title text stripped of '#' and whitespace.
     Raises an Exception if no H1 header is found.
     """
-    lines = markdown.split('\n')
+    return extract_title_from_lines(markdown.split('\n'))
+
+def extract_title_from_lines(lines) -> str:
+    """
+    Same as extract_title, but scans an iterable of lines (str or UTF-8
+    bytes, with or without line endings) and stops at the first H1, so a
+    large file does not have to be split up front.
+    """
     for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.rstrip("\n")
         # Check if the line starts with '#' followed by content (not '##')
         if line.startswith("# "):
             return line[1:].strip()
@@ -24,52 +53,281 @@ def extract_title(markdown: str) -> str:
 # print(extract_title("# Hello"))  # Output: "Hello"
 # print(extract_title("## Not a title\n# Actual Title"))  # Output: "Actual Title"
 
-def generate_page(from_path, template_path, dest_path, basepath='/'):
+def normalize_basepath(basepath: str) -> str:
+    """Returns `basepath` with a leading and a trailing '/', e.g. "docs" -> "/docs/"."""
+    if not basepath.startswith('/'):
+        basepath = '/' + basepath
+    if not basepath.endswith('/'):
+        basepath = basepath + '/'
+    return basepath
+
+def generate_page(from_path, template_path, dest_path, basepath='/', return_html=True, *, profiler=None, block_cache=None,
+                  doc_cache=None, assets=None, minify=False, images=None):
     """
     Generates a page by reading markdown content from 'from_path',
     applying a template from 'template_path', and writing the result to 'dest_path'.
 
-    If `basepath` is provided, replaces occurrences of `href="/` and `src="/` in
-    the generated page with the basepath (normalized to include a trailing '/').
-    """
-    print(f"Generating page from {from_path} to {dest_path} using template {template_path}")
-
-    with open(from_path, 'r') as f:
-        content = f.read()
-    
-    with open(template_path, 'r') as f:
-        template = f.read()
-    
-    html_node = markdown_to_html_node(content)
-    html = html_node.to_html()
-    title = extract_title(content)
-    final_page = (
-        template
-        .replace("{{ Title }}", title)
-        .replace("{{ Content }}", html)
-    )
-
-    # normalize basepath to ensure it starts with '/' and ends with '/'
-    if not basepath.startswith('/'):
-        basepath = '/' + basepath
-    if not basepath.endswith('/'):
-        basepath_for_replace = basepath + '/'
+    If `basepath` is provided (normalized by normalize_basepath), it replaces
+    the leading '/' of root-relative href and src attributes, both in the
+    rendered nodes and in the template. Text that merely looks like an
+    attribute, e.g. inside a code block, is left alone.
+
+    The page is streamed to the destination file fragment by fragment (template
+    head, rendered content, template tail), so it never has to exist as one
+    string. The file is replaced atomically, and only if its content
+    changed. With `return_html=False` nothing is retained and None is
+    returned; otherwise the fragments are also collected and the full page
+    is returned.
+
+    If a `profiler` is given, the read, template, parse, render and write
+    stages are recorded against `from_path`. Rendering and writing are
+    interleaved while streaming, so they are reported as two consecutive
+    spans whose durations add up to the streaming loop.
+
+    `block_cache` is an optional FragmentCache passed to markdown_to_html_node
+    so blocks shared between pages are only parsed and rendered once.
+    `doc_cache` is an optional DocumentCache: if it holds this exact source,
+    parsing is skipped and only the template fill is redone. Sources above
+    STREAM_THRESHOLD bypass it.
+
+    `assets` is an optional asset map from asset_fingerprint.build_asset_map;
+    root-relative URLs naming an asset are rewritten to its fingerprinted
+    name, in the content and in the template.
+
+    With `minify`, the content tree and the template are minified (see the
+    minify module); code blocks and inline code are left untouched.
+    `images` is an optional image_size.ImageSizer adding width, height and
+    lazy-loading attributes to <img> tags.
+    """
+    pages = generate_page_targets(from_path, template_path, [(basepath, dest_path)], return_html,
+                                  profiler=profiler, block_cache=block_cache, doc_cache=doc_cache, assets=assets,
+                                  minify=minify, images=images)
+    return pages[0] if return_html else None
+
+def generate_page_targets(from_path, template_path, targets, return_html=False, *, profiler=None, block_cache=None,
+                          doc_cache=None, assets=None, minify=False, images=None, written=None, search=None):
+    """
+    Like generate_page, but writes the page once per (basepath, dest_path)
+    pair in `targets` from a single parse and render: the content is
+    rendered once into basepath-independent parts (see html_parts) and each
+    target only joins them with its own basepath. Returns the list of pages,
+    one per target, if `return_html`, otherwise None.
+
+    A single target is streamed straight from the node tree as before. Very
+    large sources are never held as one string or one tree: each block is
+    rendered and written as it is parsed, once per target.
+
+    If `written` is a list, a (dest_path, output_hash, status) tuple is
+    appended to it per target; status is "added", "modified", or
+    "unchanged" when the existing file already held the page and was left
+    alone.
+
+    If `search` is a dict, the page "title" and the "text" of its TextNodes
+    (see markdown_to_html_node) are stored in it for the search index.
+    """
+    print(f"Generating page from {from_path} to {', '.join(dest for _, dest in targets)} using template {template_path}")
+    pages = [] if return_html else None
+    rendered = _render_targets(from_path, template_path, targets, None, profiler=profiler, block_cache=block_cache,
+                               doc_cache=doc_cache, assets=assets, minify=minify, images=images, search=search)
+    for dest_path, fragments in rendered:
+        page, output_hash, status = _write_fragments(fragments, dest_path, return_html, profiler, from_path)
+        if written is not None:
+            written.append((dest_path, output_hash, status))
+        if pages is not None:
+            pages.append(page)
+    print("Page generation complete.")
+    return pages
+
+def render_page_targets(from_path, content, template_path, targets, *, profiler=None, block_cache=None, doc_cache=None,
+                        assets=None, minify=False, images=None, search=None):
+    """
+    Renders the markdown `content` read from `from_path` like
+    generate_page_targets, but returns the (dest_path, page) pairs instead
+    of writing them, so reading, rendering and writing can run as separate
+    stages (see the pipeline module). The pages are UTF-8 bytes; write them
+    with write_page.
+    """
+    pages = []
+    rendered = _render_targets(from_path, template_path, targets, content, profiler=profiler, block_cache=block_cache,
+                               doc_cache=doc_cache, assets=assets, minify=minify, images=images, search=search)
+    for dest_path, fragments in rendered:
+        with profiler.span("render", from_path) if profiler is not None else nullcontext():
+            pages.append((dest_path, b"".join(fragments)))
+    return pages
+
+def write_page(dest_path, page, profiler=None, from_path=None):
+    """
+    Writes a rendered page (str or UTF-8 bytes) to `dest_path` atomically,
+    leaving an identical file untouched. Returns (output_hash, status) as in generate_page_targets.
+    """
+    _, output_hash, status = _write_fragments((page,), dest_path, False, profiler, from_path, rendered=True)
+    return output_hash, status
+
+def _render_targets(from_path, template_path, targets, content, *, profiler, block_cache, doc_cache, assets, minify,
+                    images, search=None):
+    """
+    Parses `from_path` once (its text is read unless `content` is given)
+    and yields (dest_path, fragments) per target, where `fragments` lazily
+    renders the page for that target's basepath. Fills `search` as
+    described in generate_page_targets; with a document cache the text is
+    cached next to the page.
+    """
+    search_text = search.setdefault("text", []) if search is not None else None
+    targets = [(normalize_basepath(basepath), dest_path) for basepath, dest_path in targets]
+    if assets:
+        targets = [(AssetRewriter(basepath, assets), dest_path) for basepath, dest_path in targets]
+
+    def stage(name):
+        return profiler.span(name, from_path) if profiler is not None else nullcontext()
+
+    # compiled once per process and shared by every page of the build
+    with stage("template"):
+        template = load_template(template_path)
+        if minify:
+            template = template.minified()
+
+    parts = None
+    if content is None and os.path.getsize(from_path) > STREAM_THRESHOLD:
+        # very large source: parse straight from a memory map, and render
+        # each block as it is parsed, so neither the text nor the node tree
+        # of the document is ever materialized. Every target parses again.
+        with open(from_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            title = extract_title_from_lines(iter_lines(source))
+            if search is not None:
+                search["title"] = title
+            for i, (basepath, dest_path) in enumerate(targets):
+                source.seek(0)
+                content_html = iter_markdown_html(source, basepath, block_cache, minify=minify, images=images,
+                                                  search_text=search_text if i == 0 else None)
+                # consumed by the caller before the next target is rendered
+                yield dest_path, template.for_basepath(basepath).iter_render_bytes(Title=title, Content=content_html)
+        return
+
+    if content is None:
+        with stage("read"):
+            with open(from_path, 'r') as f:
+                content = f.read()
+
+    cached = cached_text = None
+    if doc_cache is not None:
+        variant = render_variant(content, minify, images)
+        doc_key = doc_cache.key(content, variant)
+        text_key = doc_cache.key(content, variant + TEXT_VARIANT) if search_text is not None else None
+        cached = doc_cache.get(doc_key)
+        if cached is not None and text_key is not None:
+            cached_text = doc_cache.get(text_key, count=False)
+            if cached_text is None:
+                cached = None
+    if cached is not None:
+        title, parts = cached
+        if cached_text is not None:
+            search_text.extend(cached_text[1])
     else:
-        basepath_for_replace = basepath
+        with stage("parse"):
+            html_node = markdown_to_html_node(content, block_cache, minify=minify, images=images,
+                                              search_text=search_text)
+            title = extract_title(content)
+        if doc_cache is not None:
+            with stage("cache_store"):
+                parts = html_parts([html_node])
+                doc_cache.put(doc_key, title, parts)
+                if text_key is not None:
+                    doc_cache.put(text_key, title, search_text)
+        elif len(targets) > 1:
+            with stage("render"):
+                parts = html_parts([html_node])
+    del content
+
+    if search is not None:
+        search["title"] = title
+    for basepath, dest_path in targets:
+        content_html = html_node.iter_html(basepath) if parts is None else basepath.join(parts)
+        yield dest_path, template.for_basepath(basepath).iter_render_bytes(Title=title, Content=content_html)
 
-    # replace root-relative href/src (double-quoted) with basepath-prefixed versions
-    final_page = final_page.replace('href="/', f'href="{basepath_for_replace}')
-    final_page = final_page.replace('src="/', f'src="{basepath_for_replace}')
+def _write_fragments(fragments, dest_path, return_html, profiler, from_path, rendered=False):
+    """
+    Streams `fragments` (UTF-8 bytes, or str to be encoded) to `dest_path`,
+    hashing the bytes as they go. While they match the file already at
+    `dest_path`, they are only compared with it, nothing is written; if the
+    whole page matches, the file is left untouched, mtime included, so
+    deploys only see pages that really changed, and an unchanged page costs
+    a single read. From the first difference on, the page is written to a
+    temporary file (starting with the matching prefix copied from the old
+    file) that atomically replaces `dest_path`, so a crash never leaves a
+    truncated page behind.
 
-    # make sure dest_path directories exist and create them if not
-    dest_dir = os.path.dirname(dest_path)
-    if dest_dir:
-        os.makedirs(dest_dir, exist_ok=True)
+    With a `profiler`, the time spent producing the fragments is recorded
+    as "render" and the time spent comparing and writing them as "write";
+    if the page was `rendered` beforehand (and timed there), only the write
+    is recorded.
 
-    with open(dest_path, 'w') as f:
-        f.write(final_page)
+    Returns (page, output_hash, status), where page is the joined HTML if
+    `return_html` and None otherwise, and status is "added", "modified" or
+    "unchanged".
+    """
+    collected = [] if return_html else None
+    digest = hashlib.sha256()
+    size = 0
+    clock = time.monotonic_ns
+    write_ns = 0
+    memory_scope = profiler.memory() if profiler is not None else nullcontext({})
+    with memory_scope as memory, ExitStack() as stack:
+        loop_start = clock()
+        try:
+            existing = stack.enter_context(open(dest_path, 'rb'))
+        except OSError:
+            existing = None
+        status = "modified" if existing is not None else "added"
+        out = None
+
+        def diverge(matched):
+            # start the new file with the `matched` bytes the old one shares
+            out = stack.enter_context(atomic_write(dest_path, 'wb'))
+            if existing is not None:
+                existing.seek(0)
+                while matched:
+                    chunk = existing.read(min(matched, 1 << 20))
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    matched -= len(chunk)
+                existing.close()
+            return out
+
+        for fragment in fragments:
+            if profiler is not None:
+                write_start = clock()
+            data = fragment if isinstance(fragment, bytes) else fragment.encode("utf-8")
+            digest.update(data)
+            if out is None and (existing is None or existing.read(len(data)) != data):
+                out = diverge(size)
+            if out is not None:
+                out.write(data)
+            size += len(data)
+            if profiler is not None:
+                write_ns += clock() - write_start
+            if collected is not None:
+                collected.append(data)
+        if out is None and (existing is None or existing.read(1)):
+            # a new empty page, or the old file holds more than the page
+            out = diverge(size)
+        if out is None:
+            status = "unchanged"
+        output_hash = digest.hexdigest()
+    if profiler is not None:
+        # allocations are not split between the interleaved stages; they
+        # are attributed to rendering, or to the write of a rendered page
+        render_ns = clock() - loop_start - write_ns
+        if not rendered:
+            profiler.record("render", loop_start, render_ns, from_path, memory["peak_bytes"], memory["net_bytes"])
+            profiler.record("write", loop_start + render_ns, write_ns, from_path)
+        else:
+            profiler.record("write", loop_start + render_ns, write_ns, from_path, memory["peak_bytes"],
+                            memory["net_bytes"])
+    if status != "unchanged":
         print(f"Page generated at {dest_path}")
         # Log the path of the generated file
         print(f"Generated file: {dest_path}")
-    print("Page generation complete.")
-    return final_page
+    else:
+        print(f"Page unchanged at {dest_path}")
+    return (b"".join(collected).decode("utf-8") if collected is not None else None), output_hash, status
@@ -1,11 +1,58 @@
+import re
 from enum import Enum
 
+# Closing tags are shared across all nodes with the same tag.
+_CLOSE_TAGS = {}
+
+# Attributes whose root-relative URLs get the basepath applied when rendering.
+URL_ATTRIBUTES = frozenset(("href", "src"))
+
+# Attribute values that are valid without quotes (HTML "unquoted attribute value").
+UNQUOTED_VALUE = re.compile(r'[^\s"\'=<>`]+\Z')
+
+def is_root_relative(url) -> bool:
+    """True for URLs like "/blog/" (but not protocol-relative "//host/...")."""
+    return isinstance(url, str) and url.startswith("/") and not url.startswith("//")
+
+def close_tag(tag: str) -> str:
+    """Returns the interned closing tag string for `tag`."""
+    closing = _CLOSE_TAGS.get(tag)
+    if closing is None:
+        closing = _CLOSE_TAGS[tag] = f"</{tag}>"
+    return closing
+
 class HTMLNode:
+    # Slots instead of a per-instance __dict__: builds allocate millions of
+    # nodes. `_open_tag` caches the rendered opening tag (with attributes, as
+    # the parts returned by open_tag_parts) and is reset whenever `tag` or
+    # `props` is reassigned. Code that mutates a
+    # props dict in place after rendering must reassign it to refresh the cache.
+    __slots__ = ("_tag", "value", "children", "_props", "_open_tag")
+
     def __init__(self, tag: str = None, value: str = None, children: list = None, props: dict = None):
-        self.tag = tag
+        self._open_tag = None
+        self._tag = tag
         self.value = value
         self.children = children if children is not None else []
-        self.props = props if props is not None else {}
+        self._props = props if props is not None else {}
+
+    @property
+    def tag(self):
+        return self._tag
+
+    @tag.setter
+    def tag(self, tag):
+        self._tag = tag
+        self._open_tag = None
+
+    @property
+    def props(self):
+        return self._props
+
+    @props.setter
+    def props(self, props):
+        self._props = props
+        self._open_tag = None
         
     def __eq__(self, other):
         if not isinstance(other, HTMLNode):
@@ -15,45 +62,185 @@ class HTMLNode:
                 self.children == other.children and
                 self.props == other.props)
     
-    def to_html(self) -> str:
+    def to_html(self, basepath: str = "/") -> str:
         raise NotImplementedError("to_html method not implemented")
+
+    def iter_html(self, basepath: str = "/"):
+        """
+        Yields the rendered HTML of this node as a sequence of string fragments.
+
+        `basepath` (with a trailing '/') replaces the leading '/' of every
+        root-relative URL in an href/src attribute; the default "/" renders
+        URLs as written. Any object with a join(parts) method, such as an
+        asset_fingerprint.AssetRewriter, may be passed instead of a string.
+        """
+        yield self.to_html(basepath)
+
+    def write_html(self, out, basepath: str = "/"):
+        """Streams the rendered HTML into `out`, any object with a text write() (a file, io.StringIO)."""
+        out.writelines(self.iter_html(basepath))
     
     def props_to_html(self) -> str:
-        if self.props is None:
+        if not self._props:
             return ""
-        props_str = ""
-        for key, value in self.props.items():
-            props_str += f' {key}="{value}"'
-        return props_str
+        return "".join([f' {key}="{value}"' for key, value in self._props.items()])
+
+    def open_tag_parts(self) -> tuple:
+        """
+        Returns the opening tag with its attributes, rendered once and cached,
+        as a tuple of parts split where the leading '/' of each root-relative
+        URL attribute was. `basepath.join(parts)` applies a basepath, so a
+        tag without such URLs is a single part and costs nothing to rewrite.
+        """
+        parts = self._open_tag
+        if parts is None:
+            parts = self._open_tag = self._render_open_tag()
+        return parts
+
+    def _render_open_tag(self, unquote: bool = False) -> tuple:
+        parts = []
+        current = [f"<{self._tag}"]
+        for key, value in self._props.items():
+            if key in URL_ATTRIBUTES and is_root_relative(value):
+                current.append(f' {key}="')
+                parts.append("".join(current))
+                current = [f'{value[1:]}"']
+            elif unquote and key not in URL_ATTRIBUTES and UNQUOTED_VALUE.match(str(value)):
+                current.append(f' {key}={value}')
+            else:
+                current.append(f' {key}="{value}"')
+        current.append(">")
+        parts.append("".join(current))
+        return tuple(parts)
+
+    def unquote_attributes(self):
+        """
+        Re-renders the cached opening tag without the quotes that attribute
+        values do not need, for minified output. URL attributes keep theirs,
+        since basepath and asset rewriting look for the closing quote.
+        Reassigning `tag` or `props` restores the normal rendering.
+        """
+        self._open_tag = self._render_open_tag(unquote=True)
+
+    def open_tag(self, basepath: str = "/") -> str:
+        """Returns the opening tag with its attributes and `basepath` applied to root-relative URLs."""
+        return basepath.join(self.open_tag_parts())
     
     
     def __repr__(self):
         return f"HTMLNode({self.tag!r}, {self.children!r}, {self.props!r})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self) -> str:
+    def to_html(self, basepath: str = "/") -> str:
         if self.value is None:
             raise ValueError("LeafNode must have a value to convert to HTML")
         if self.tag is None:
             return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        return f"{self.open_tag(basepath)}{self.value}{close_tag(self._tag)}"
     
     def __repr__(self):
         return f"LeafNode({self.tag!r}, {self.value!r}, {self.props!r})"
+
+class RawHTMLNode(LeafNode):
+    """
+    Already rendered HTML, such as a fragment restored from a cache. The
+    value is the tuple of parts produced by html_parts, so the basepath is
+    still applied to its root-relative URLs each time it is rendered.
+    """
+    __slots__ = ()
+
+    def __init__(self, parts):
+        super().__init__(None, tuple(parts))
+
+    def to_html(self, basepath: str = "/") -> str:
+        return basepath.join(self.value)
+
+    def __repr__(self):
+        return f"RawHTMLNode({self.value!r})"
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self) -> str:
+    def to_html(self, basepath: str = "/") -> str:
+        return "".join(self.iter_html(basepath))
+
+    def _check_renderable(self):
         if self.tag is None:
             raise ValueError("ParentNode must have a tag to convert to HTML")
         if not self.children:
             raise ValueError("ParentNode must have children to convert to HTML")
-        return f"<{self.tag}{self.props_to_html()}>" + "".join(child.to_html() for child in self.children) + f"</{self.tag}>"
+
+    def iter_html(self, basepath: str = "/"):
+        """
+        Yields opening tags, leaf HTML and closing tags in document order,
+        with `basepath` applied to root-relative href/src attributes.
+
+        The tree is walked with an explicit stack instead of recursion, so
+        each fragment is produced once no matter how deeply it is nested and
+        deep documents do not hit the recursion limit. Invalid nodes raise
+        ValueError when the walk reaches them.
+        """
+        self._check_renderable()
+        yield self.open_tag(basepath)
+        stack = [(self, iter(self.children))]
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                yield close_tag(node._tag)
+            elif isinstance(child, ParentNode):
+                child._check_renderable()
+                yield child.open_tag(basepath)
+                stack.append((child, iter(child.children)))
+            elif isinstance(child, LeafNode):
+                yield child.to_html(basepath)
+            else:
+                yield from child.iter_html(basepath)
     
     def __repr__(self):
-        return f"ParentNode({self.tag!r}, {self.children!r}, {self.props!r})"
\ No newline at end of file
+        return f"ParentNode({self.tag!r}, {self.children!r}, {self.props!r})"
+
+def html_parts(nodes) -> list:
+    """
+    Renders `nodes` in order into a basepath-independent form: a list of
+    HTML parts split where the leading '/' of each root-relative URL
+    attribute was, so `basepath.join(parts)` equals the nodes rendered with
+    that basepath. This is what caches store (see RawHTMLNode).
+    """
+    parts = []
+    current = []
+    stack = [(None, iter(nodes))]
+    while stack:
+        parent, children = stack[-1]
+        node = next(children, None)
+        if node is None:
+            stack.pop()
+            if parent is not None:
+                current.append(close_tag(parent._tag))
+            continue
+        if isinstance(node, ParentNode):
+            node._check_renderable()
+            pieces = node.open_tag_parts()
+            stack.append((node, iter(node.children)))
+        elif isinstance(node, RawHTMLNode):
+            pieces = node.value
+        elif isinstance(node, LeafNode) and node._tag is not None and node.value is not None:
+            pieces = node.open_tag_parts()
+            pieces = pieces[:-1] + (f"{pieces[-1]}{node.value}{close_tag(node._tag)}",)
+        else:
+            pieces = (node.to_html(),)
+        current.append(pieces[0])
+        for piece in pieces[1:]:
+            parts.append("".join(current))
+            current = [piece]
+    parts.append("".join(current))
+    return parts
\ No newline at end of file
@@ -0,0 +1,141 @@
+import os
+import struct
+from build_manifest import hash_bytes
+from splitnodes import IMAGE_AT
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+IMAGE_EXTENSIONS = frozenset((".png", ".jpg", ".jpeg", ".gif"))
+# JPEG start-of-frame markers carry the dimensions (DHT, JPG and DAC share the range)
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Give up on a JPEG whose frame header is not within this many bytes.
+JPEG_SCAN_LIMIT = 1 << 20
+
+def _jpeg_size(f):
+    f.seek(2)
+    while f.tell() < JPEG_SCAN_LIMIT:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue  # markers without a length
+        header = f.read(2)
+        if len(header) < 2:
+            return None
+        length = struct.unpack(">H", header)[0]
+        if length < 2:
+            return None
+        if code in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+    return None
+
+def read_image_size(path: str):
+    """
+    Returns (width, height) of a PNG, GIF or JPEG file from its header bytes,
+    or None if the file is missing or not a recognized image. PNG and GIF
+    need the first 24 bytes; JPEG is scanned segment by segment up to the
+    frame header, skipping segment bodies such as embedded thumbnails.
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(24)
+            if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head[:2] == b"\xff\xd8":
+                return _jpeg_size(f)
+    except (OSError, struct.error):
+        return None
+    return None
+
+# Image sizes by path, validated against the file's mtime and size.
+_size_cache = {}
+
+def image_size(path: str):
+    """read_image_size, cached per process by (path, mtime, size)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _size_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    size = read_image_size(path)
+    _size_cache[path] = (key, size)
+    return size
+
+def images_digest(static_dir: str) -> str:
+    """Returns a hash of the path, mtime and size of every image under `static_dir`."""
+    stamps = []
+    for dirpath, dirnames, filenames in os.walk(static_dir):
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+                path = os.path.join(dirpath, filename)
+                st = os.stat(path)
+                stamps.append(f"{os.path.relpath(path, static_dir)}\0{st.st_mtime_ns}\0{st.st_size}")
+    return hash_bytes("\n".join(sorted(stamps)).encode("utf-8"))
+
+class ImageSizer:
+    """
+    Extra attributes for generated <img> tags: `width` and `height` read
+    from the image file for root-relative URLs found under `static_dir`,
+    plus loading="lazy" and decoding="async" so images neither block first
+    paint nor shift the layout when they arrive.
+    """
+
+    def __init__(self, static_dir: str):
+        self.static_dir = static_dir
+
+    def path_for(self, url: str):
+        """Returns the file under `static_dir` a root-relative image URL points at, or None."""
+        if not url.startswith("/") or url.startswith("//"):
+            return None
+        rel = url[1:].split("?", 1)[0].split("#", 1)[0]
+        path = os.path.normpath(os.path.join(self.static_dir, rel))
+        if os.path.commonpath([os.path.abspath(path), os.path.abspath(self.static_dir)]) != os.path.abspath(self.static_dir):
+            return None
+        return path
+
+    def props(self, url: str) -> dict:
+        props = {}
+        path = self.path_for(url)
+        size = image_size(path) if path is not None else None
+        if size is not None:
+            props["width"] = str(size[0])
+            props["height"] = str(size[1])
+        props["loading"] = "lazy"
+        props["decoding"] = "async"
+        return props
+
+    def stamp(self, markdown: str) -> str:
+        """
+        Describes the image files `markdown` refers to (path, mtime and size),
+        for cache keys of HTML rendered with these attributes. Empty if the
+        text has no images.
+        """
+        if "![" not in markdown:
+            return ""
+        stamps = []
+        for match in IMAGE_AT.finditer(markdown):
+            url = match.group(2)
+            path = self.path_for(url)
+            try:
+                st = os.stat(path) if path is not None else None
+            except OSError:
+                st = None
+            stamps.append(f"{url}:{st.st_mtime_ns}:{st.st_size}" if st is not None else url)
+        return "\n".join(stamps)
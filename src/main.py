@@ -1,32 +1,756 @@
+import argparse
+import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import NamedTuple
 from textnode import TextNode
 from htmlnode import HTMLNode
-from copy_directory import copy_directory
-from generation_tools import generate_page
+from copy_directory import sync_directory, sync_file
+from atomic_file import atomic_write
+from generation_tools import STREAM_THRESHOLD, normalize_basepath, generate_page_targets, render_page_targets, write_page, PageGenerationError
+from build_manifest import BuildManifest, hash_bytes, hash_file
+from deploy_manifest import ADDED, DELETED, MODIFIED, DeployManifest, load_stamps, save_stamps
+from watcher import watch
+from pipeline import run_pipeline
+from profiler import Profiler
+from fragment_cache import FragmentCache, format_cache_stats
+from document_cache import DocumentCache
+from precompress import SIDECAR_SUFFIXES, precompress_directory, zstd_available
+from search_index import SEARCH_DIR, load_search_state, page_terms, save_search_state, write_search_index
+from png_optimize import PNG_CACHE_DIR, optimize_pngs
+from image_size import ImageSizer, images_digest
+from asset_fingerprint import ASSET_MANIFEST_NAME, assets_digest, build_asset_map, write_fingerprinted
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else '/'
-    print(f"Base path for the site: {basepath}")
+CONTENT_DIR = 'content'
+STATIC_DIR = 'static'
+OUTPUT_DIR = 'docs'
+TEMPLATE_PATH = 'template.html'
+MANIFEST_PATH = '.build_manifest.json'
+DEPLOY_MANIFEST_PATH = '.deploy_manifest.json'
+BLOCK_CACHE_DIR = os.path.join('.cache', 'blocks')
+DOC_CACHE_DIR = os.path.join('.cache', 'documents')
 
-    # copy static files first
-    copy_directory('static', 'docs')
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Generate the static site from content/ into docs/.")
+    parser.add_argument('basepath', nargs='?', default='/', help="URL prefix the site is served under (default: /)")
+    parser.add_argument('--target', action='append', type=parse_target, metavar='BASEPATH=DIR',
+                        help=f"build the site for BASEPATH into DIR; repeat to build several variants from one "
+                             f"parse and render (replaces the basepath argument and {OUTPUT_DIR}/)")
+    parser.add_argument('--full', action='store_true', help="ignore the build manifest and regenerate every page")
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help="generate pages in N worker processes (0 = one per CPU core)")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="overlap reading sources and writing pages with rendering (asyncio stages joined by "
+                             "bounded queues; rendering uses the --jobs workers)")
+    parser.add_argument('--queue-size', type=int, default=None, metavar='N',
+                        help="with --pipeline, pages that may wait between two stages (default: twice the workers)")
+    parser.add_argument('--checksum', action='store_true', help="compare static files by content hash instead of size/mtime")
+    parser.add_argument('--link-static', action='store_true', help="hardlink static files into docs/ instead of copying them")
+    parser.add_argument('--watch', action='store_true', help="after building, watch content/, static/ and the template and rebuild what changes")
+    parser.add_argument('--profile', nargs='?', const='build-profile', metavar='PREFIX',
+                        help="record per-stage timings and memory (traced with tracemalloc, which slows the build) "
+                             "to PREFIX.json and PREFIX.trace.json (default prefix: build-profile)")
+    parser.add_argument('--profile-top', type=int, default=10, metavar='N', help="number of slowest pages to list in the profile summary")
+    parser.add_argument('--block-cache', action='store_true',
+                        help=f"reuse rendered HTML of blocks shared between pages, backed by {BLOCK_CACHE_DIR}/")
+    parser.add_argument('--block-cache-mb', type=int, default=64, metavar='MB', help="in-memory size cap of the block cache per process")
+    parser.add_argument('--fingerprint', action='store_true',
+                        help=f"also copy static files under content-hashed names, point the template and page links at them "
+                             f"and write {ASSET_MANIFEST_NAME}")
+    parser.add_argument('--minify', action='store_true',
+                        help="minify the template and rendered pages (code blocks are left untouched)")
+    parser.add_argument('--image-sizes', action='store_true',
+                        help=f"add width/height read from the files in {STATIC_DIR}/ and lazy loading to <img> tags")
+    parser.add_argument('--optimize-images', action='store_true',
+                        help=f"ship losslessly recompressed copies of PNGs in {STATIC_DIR}/, cached in {PNG_CACHE_DIR}/")
+    parser.add_argument('--precompress', action='store_true',
+                        help="write .gz (and .zst, if a zstd module is available) sidecars of text outputs for the web server")
+    parser.add_argument('--search-index', action='store_true',
+                        help=f"write a sharded client-side search index of the page text to {SEARCH_DIR}/ in the output")
+    parser.add_argument('--changed-list', metavar='FILE',
+                        help="write the output files the build created or modified to FILE, one per line "
+                             "(e.g. for rsync --files-from)")
+    parser.add_argument('--doc-cache', action='store_true',
+                        help=f"keep parsed pages in {DOC_CACHE_DIR}/ so template or basepath changes skip re-parsing")
+    args = parser.parse_args(argv)
+    overlap = overlapping_outputs(args.target or [])
+    if overlap:
+        # each target's sync deletes whatever it does not own, so one output
+        # directory inside another would be wiped and rebuilt on every build
+        parser.error(f"--target output directories {overlap[0]!r} and {overlap[1]!r} overlap")
+    return args
 
-    # generate pages for every markdown file under content/
-    for dirpath, dirnames, filenames in __import__('os').walk('content'):
+def parse_target(value):
+    """Parses a --target value of the form BASEPATH=DIR into a (basepath, output_dir) pair."""
+    basepath, sep, output_dir = value.partition('=')
+    if not sep or not output_dir:
+        raise argparse.ArgumentTypeError(f"expected BASEPATH=DIR, got {value!r}")
+    return (basepath or '/', output_dir)
+
+def overlapping_outputs(targets):
+    """Returns the first pair of output directories in `targets` that are equal or nested, or None."""
+    for i, (_, first) in enumerate(targets):
+        for _, second in targets[i + 1:]:
+            if _is_under(first, second) or _is_under(second, first):
+                return first, second
+    return None
+
+def build_targets(args):
+    """Returns the (basepath, output_dir) pairs to build: the --target values, or the basepath into docs/."""
+    return args.target or [(args.basepath, OUTPUT_DIR)]
+
+def _target_slug(output_dir):
+    return re.sub(r'[^\w.-]+', '_', os.path.normpath(output_dir)).strip('_')
+
+def manifest_path(output_dir):
+    """Returns the build manifest path for `output_dir`; docs/ keeps the historical name."""
+    if os.path.normpath(output_dir) == OUTPUT_DIR:
+        return MANIFEST_PATH
+    return f".build_manifest.{_target_slug(output_dir)}.json"
+
+def deploy_manifest_path(output_dir):
+    """Returns where the deploy manifest of the last build into `output_dir` is written."""
+    if os.path.normpath(output_dir) == OUTPUT_DIR:
+        return DEPLOY_MANIFEST_PATH
+    return f".deploy_manifest.{_target_slug(output_dir)}.json"
+
+def deploy_stamps_path(output_dir):
+    """Returns where the size/mtime stamps of the static files last synced into `output_dir` are kept."""
+    return os.path.join('.cache', f"deploy_stamps.{_target_slug(output_dir)}.json")
+
+def static_outputs(output_dir):
+    """Returns the output path of every file under STATIC_DIR."""
+    return [os.path.join(output_dir, os.path.relpath(os.path.join(dirpath, filename), STATIC_DIR))
+            for dirpath, dirnames, filenames in os.walk(STATIC_DIR) for filename in filenames]
+
+def page_dest(from_path, content_dir=CONTENT_DIR, output_dir=OUTPUT_DIR):
+    """Maps a markdown source under `content_dir` to its .html path under `output_dir`."""
+    rel = os.path.relpath(from_path, content_dir)
+    return os.path.join(output_dir, rel[:-3] + '.html')  # replace .md with .html
+
+def find_pages(content_dir, output_dir):
+    """
+    Returns (from_path, dest_path) pairs for every markdown file under
+    `content_dir`, sorted by source path so builds are deterministic.
+    """
+    pages = []
+    for dirpath, dirnames, filenames in os.walk(content_dir):
         for filename in filenames:
             if not filename.endswith('.md'):
                 continue
-            from_path = __import__('os').path.join(dirpath, filename)
+            from_path = os.path.join(dirpath, filename)
             # compute destination path under docs/ preserving structure
-            rel = __import__('os').path.relpath(from_path, 'content')
-            dest_rel = rel[:-3] + '.html'  # replace .md with .html
-            dest_path = __import__('os').path.join('docs', dest_rel)
-            generate_page(
-                from_path=from_path,
-                template_path='template.html',
-                dest_path=dest_path,
-                basepath=basepath
-            )
+            pages.append((from_path, page_dest(from_path, content_dir, output_dir)))
+    pages.sort()
+    return pages
+
+def remove_outputs(paths):
+    """Deletes generated pages whose sources disappeared; returns the paths removed."""
+    removed = []
+    for path in paths:
+        if os.path.isfile(path):
+            os.remove(path)
+            removed.append(path)
+            print(f"Removed stale page: {path}")
+    return removed
+
+# One block cache per process, created on first use from its (max_bytes, directory) config.
+_block_caches = {}
+
+def get_block_cache(config):
+    if config is None:
+        return None
+    cache = _block_caches.get(config)
+    if cache is None:
+        cache = _block_caches[config] = FragmentCache(*config)
+    return cache
+
+class BuildOptions(NamedTuple):
+    """
+    The options every page of a build is generated with, passed as one
+    picklable value to the worker processes: `block_cache` is the
+    (max_bytes, directory) config of the process-local FragmentCache,
+    `doc_cache` the DocumentCache directory, `assets` the asset map of a
+    --fingerprint build, `minify` the --minify flag and `image_root` the
+    static directory images are sized from (None to leave <img> tags bare).
+    With `profile`, spans are recorded and with `search`, each page's search
+    index entry is collected.
+    """
+    template_path: str
+    profile: bool = False
+    block_cache: tuple = None
+    doc_cache: str = None
+    assets: dict = None
+    minify: bool = False
+    image_root: str = None
+    search: bool = False
+
+def build_page(from_path, targets, options):
+    """
+    Generates one page for every (basepath, dest_path) pair in `targets` with
+    the BuildOptions `options` and returns a dict with the output "hashes"
+    (one per target), the "changed" outputs as (dest_path, status,
+    output_hash) tuples (only those whose content actually differed, status
+    "added" or "modified"), the profile "events" and the block and document
+    "cache_stats" counted for this page. Runs in worker processes, so it
+    must stay a module-level function and only take and return picklable
+    values: spans are returned rather than recorded so the parent can merge
+    them. With `options.search`, the page's [title, terms] for the search
+    index are returned as "search" (tokenized here, in the worker).
+    """
+    profiler = Profiler(trace_memory=True) if options.profile else None
+    cache = get_block_cache(options.block_cache)
+    before = cache.stats() if cache is not None else None
+    documents = DocumentCache(options.doc_cache) if options.doc_cache is not None else None
+    written = []
+    page_search = {} if options.search else None
+    generate_page_targets(
+        from_path=from_path,
+        template_path=options.template_path,
+        targets=targets,
+        profiler=profiler,
+        block_cache=cache,
+        doc_cache=documents,
+        assets=options.assets,
+        minify=options.minify,
+        images=ImageSizer(options.image_root) if options.image_root is not None else None,
+        written=written,
+        search=page_search
+    )
+    return {
+        "hashes": [output_hash for _, output_hash, _ in written],
+        "changed": [(dest_path, status, output_hash) for dest_path, output_hash, status in written
+                    if status != "unchanged"],
+        "events": profiler.events if profiler is not None else [],
+        "cache_stats": _cache_stats(cache, before, documents),
+        "search": _search_entry(page_search),
+    }
+
+def _search_entry(page_search):
+    """Returns [title, terms] for the search index from what generate_page_targets collected, or None."""
+    if page_search is None:
+        return None
+    return [page_search["title"], page_terms(page_search["text"])]
+
+def _cache_stats(cache, before, documents):
+    """Returns the block cache counters since `before` plus the document cache counters."""
+    cache_stats = {}
+    if cache is not None:
+        cache_stats = {name: count - before[name] for name, count in cache.stats().items()}
+    if documents is not None:
+        cache_stats.update(documents.stats())
+    return cache_stats
+
+def read_source(job):
+    """
+    Pipeline read stage: `job` is the (from_path, targets, options)
+    arguments of build_page; returns them with the text of the source and
+    the profile events of the read appended. The text is None for sources
+    above STREAM_THRESHOLD, which render_source generates in one streaming
+    pass.
+    """
+    from_path, _, options = job
+    if os.path.getsize(from_path) > STREAM_THRESHOLD:
+        return job + (None, [])
+    profiler = Profiler(trace_memory=True) if options.profile else None
+    with profiler.span("read", from_path) if profiler is not None else nullcontext():
+        with open(from_path, 'r') as f:
+            content = f.read()
+    return job + (content, profiler.events if profiler is not None else [])
+
+def render_source(job):
+    """
+    Pipeline render stage, run in worker processes: renders the source text
+    read by read_source for every target without writing anything. Returns
+    a dict with the rendered "pages" as (dest_path, page) pairs and the
+    page's "events" and "cache_stats" as in build_page. A source without
+    text is generated and written here by build_page instead.
+    """
+    from_path, targets, options, content, events = job
+    if content is None:
+        return build_page(from_path, targets, options)
+    profiler = Profiler(trace_memory=True) if options.profile else None
+    cache = get_block_cache(options.block_cache)
+    before = cache.stats() if cache is not None else None
+    documents = DocumentCache(options.doc_cache) if options.doc_cache is not None else None
+    if profiler is not None:
+        profiler.extend(events)
+    page_search = {} if options.search else None
+    pages = render_page_targets(
+        from_path, content, options.template_path, targets,
+        profiler=profiler,
+        block_cache=cache,
+        doc_cache=documents,
+        assets=options.assets,
+        minify=options.minify,
+        images=ImageSizer(options.image_root) if options.image_root is not None else None,
+        search=page_search,
+    )
+    return {
+        "from_path": from_path,
+        "pages": pages,
+        "events": profiler.events if profiler is not None else [],
+        "cache_stats": _cache_stats(cache, before, documents),
+        "search": _search_entry(page_search),
+    }
+
+def write_rendered(rendered):
+    """
+    Pipeline write stage: writes the pages returned by render_source and
+    returns the same dict as build_page. Outcomes of pages render_source
+    already wrote are passed through.
+    """
+    if "pages" not in rendered:
+        return rendered
+    from_path = rendered["from_path"]
+    profiler = Profiler(trace_memory=True) if rendered["events"] else None
+    written = [(dest_path,) + write_page(dest_path, page, profiler, from_path) for dest_path, page in rendered["pages"]]
+    return {
+        "hashes": [output_hash for _, output_hash, _ in written],
+        "changed": [(dest_path, status, output_hash) for dest_path, output_hash, status in written
+                    if status != "unchanged"],
+        "events": rendered["events"] + (profiler.events if profiler is not None else []),
+        "cache_stats": rendered["cache_stats"],
+        "search": rendered["search"],
+    }
+
+def generate_pages(pages, options, jobs=1, profiler=None, cache_stats=None, changed=None, pipeline=False,
+                   queue_size=None, search=None):
+    """
+    Generates every (from_path, targets) pair in `pages` with the
+    BuildOptions `options`, where `targets` lists the (basepath, dest_path)
+    outputs written from that source, sequentially when `jobs` is 1 or
+    across a pool of `jobs` worker processes otherwise. Its `profile` and
+    `search` flags follow `profiler` and `search`.
+
+    Returns (results, failures): `results` maps each successfully generated
+    from_path to its output hashes (one per target), and `failures` lists a
+    PageGenerationError per failed page. Both follow the order of `pages`
+    regardless of which worker finished first. Per-page spans are merged
+    into `profiler` if given.
+
+    The block and document cache counters are summed into the `cache_stats`
+    dict if given. The (dest_path, status, output_hash) of every output
+    whose content actually changed is appended to the `changed` list if
+    given.
+
+    With `pipeline`, pages go through pipeline.run_pipeline instead: sources
+    are read and pages written by I/O threads while others render, with at
+    most `queue_size` pages waiting between two stages.
+
+    If `search` is a dict, each generated page's [title, terms] for the
+    search index is stored in it by from_path.
+    """
+    results = {}
+    failures = []
+    profile = profiler is not None
+    options = options._replace(profile=profile, search=search is not None)
+
+    def collect(from_path, outcome):
+        results[from_path] = outcome["hashes"]
+        if changed is not None:
+            changed.extend(outcome["changed"])
+        if search is not None:
+            search[from_path] = outcome["search"]
+        if profile:
+            profiler.extend(outcome["events"])
+        if cache_stats is not None and outcome["cache_stats"]:
+            for name, count in outcome["cache_stats"].items():
+                cache_stats[name] = cache_stats.get(name, 0) + count
+
+    if pipeline:
+        jobs_in = [(from_path, (from_path, targets, options)) for from_path, targets in pages]
+        for from_path, outcome in run_pipeline(jobs_in, read_source, render_source, write_rendered, jobs,
+                                               queue_size=queue_size):
+            if isinstance(outcome, Exception):
+                failures.append(PageGenerationError(from_path, outcome))
+            else:
+                collect(from_path, outcome)
+        return results, failures
+
+    if jobs == 1 or len(pages) <= 1:
+        for from_path, targets in pages:
+            try:
+                collect(from_path, build_page(from_path, targets, options))
+            except Exception as e:
+                failures.append(PageGenerationError(from_path, e))
+        return results, failures
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(build_page, from_path, targets, options)
+            for from_path, targets in pages
+        ]
+        for (from_path, _), future in zip(pages, futures):
+            try:
+                collect(from_path, future.result())
+            except Exception as e:
+                failures.append(PageGenerationError(from_path, e))
+    return results, failures
+
+def block_cache_config(args):
+    """Returns the (max_bytes, directory) block cache config for `args`, or None if disabled."""
+    if not args.block_cache:
+        return None
+    return (args.block_cache_mb * 1024 * 1024, BLOCK_CACHE_DIR)
+
+def build_options(args, assets=None):
+    """Returns the BuildOptions of the pages built for `args`; profiling and search are set by generate_pages."""
+    return BuildOptions(
+        template_path=TEMPLATE_PATH,
+        block_cache=block_cache_config(args),
+        doc_cache=DOC_CACHE_DIR if args.doc_cache else None,
+        assets=assets,
+        minify=args.minify,
+        image_root=STATIC_DIR if args.image_sizes else None,
+    )
+
+def layout_hash(args, assets=None):
+    """
+    Returns the hash of every input besides its source that shapes a page:
+    the template, the asset map when fingerprinting, the --minify flag and,
+    with --image-sizes, the image files.
+    """
+    template_hash = hash_file(TEMPLATE_PATH)
+    if not assets and not args.minify and not args.image_sizes:
+        return template_hash
+    inputs = [
+        template_hash,
+        assets_digest(assets) if assets else "",
+        "min" if args.minify else "",
+        images_digest(STATIC_DIR) if args.image_sizes else "",
+    ]
+    return hash_bytes("\0".join(inputs).encode("utf-8"))
+
+def page_outputs(from_path, targets):
+    """Returns the (target index, dest_path) pair of every target for a markdown source."""
+    return [(i, page_dest(from_path, CONTENT_DIR, output_dir)) for i, (_, output_dir) in enumerate(targets)]
+
+def generate_and_record(pages, manifests, args, jobs, source_hashes=None, profiler=None, assets=None, deploys=None,
+                        search=None):
+    """
+    Generates `pages`, a list of (from_path, outputs) pairs where `outputs`
+    are the (target index, dest_path) pairs to write, and records each
+    successful output in the manifest of its target. Returns the list of
+    failures.
+
+    Outputs that already held the rendered bytes are left untouched; the
+    files actually rewritten are recorded in the DeployManifest of their
+    target if `deploys` is given. Search index entries of the generated
+    pages are collected into the `search` dict if given.
+    """
+    targets = build_targets(args)
+    template_hash = layout_hash(args, assets)
+    if source_hashes is None:
+        source_hashes = {from_path: hash_file(from_path) for from_path, _ in pages}
+    cache_stats = {}
+    written_pages = []
+    results, failures = generate_pages(
+        [(from_path, [(targets[i][0], dest_path) for i, dest_path in outputs]) for from_path, outputs in pages],
+        build_options(args, assets), jobs, profiler, cache_stats, written_pages, args.pipeline, args.queue_size,
+        search,
+    )
+    if "hits" in cache_stats:
+        print(format_cache_stats(cache_stats))
+    if "doc_hits" in cache_stats:
+        print(f"Document cache: {cache_stats['doc_hits']} hits, {cache_stats['doc_misses']} misses.")
+    written = sum(len(results[from_path]) for from_path, _ in pages if from_path in results)
+    print(f"Wrote {len(written_pages)} changed page file(s); {written - len(written_pages)} identical left untouched.")
+    if deploys is not None:
+        target_of = {dest_path: i for _, outputs in pages for i, dest_path in outputs}
+        for dest_path, status, output_hash in written_pages:
+            deploys[target_of[dest_path]].record(dest_path, status, output_hash)
+    for from_path, outputs in pages:
+        if from_path not in results:
+            continue
+        for (i, dest_path), output_hash in zip(outputs, results[from_path]):
+            manifests[i].record(from_path, dest_path, source_hashes[from_path], template_hash, targets[i][0], output_hash)
+    return failures
+
+def report_failures(failures):
+    for failure in failures:
+        print(failure, file=sys.stderr)
+
+def build(args, jobs, profiler=None):
+    """
+    Runs one build (full or incremental, depending on the manifests and
+    --full) for every target. Returns the updated manifests, one per target,
+    and the list of page failures. Build-level and per-page stages are
+    recorded in `profiler` if given.
+    """
+    def stage(name):
+        return profiler.span(name) if profiler is not None else nullcontext()
+
+    targets = build_targets(args)
+    with stage("load_manifest"):
+        manifests = [
+            BuildManifest(manifest_path(output_dir)) if args.full else BuildManifest.load(manifest_path(output_dir))
+            for _, output_dir in targets
+        ]
+
+    with stage("find_pages"):
+        sources = [from_path for from_path, _ in find_pages(CONTENT_DIR, OUTPUT_DIR)]
+
+    with stage("optimize_images"):
+        replacements = optimize_images(args, jobs)
+
+    # fingerprints name the bytes actually shipped, so images are optimized first
+    with stage("fingerprint"):
+        assets = build_asset_map(STATIC_DIR, replacements) if args.fingerprint else None
+
+    # copy static files first; only what changed is synced, and the current
+    # pages (and fingerprinted assets) are kept in place even on full builds
+    # so identical outputs are not rewritten. Everything else is removed.
+    deploys = [DeployManifest(output_dir, basepath) for basepath, output_dir in targets]
+    with stage("copy_static"):
+        for (_, output_dir), deploy in zip(targets, deploys):
+            keep = [os.path.relpath(page_dest(from_path, CONTENT_DIR, output_dir), output_dir)
+                    for from_path in sources]
+            if assets:
+                keep.extend(assets.values())
+                keep.append(ASSET_MANIFEST_NAME)
+            if args.search_index:
+                keep.extend(search_files(output_dir))
+            result = sync_directory(STATIC_DIR, output_dir, keep=keep, checksum=args.checksum, link=args.link_static,
+                                    keep_suffixes=SIDECAR_SUFFIXES if args.precompress else (),
+                                    replacements=replacements)
+            added = set(result["added"])
+            for rel in result["copied"]:
+                deploy.record(os.path.join(output_dir, rel), ADDED if rel in added else MODIFIED)
+            for rel in result["deleted"]:
+                deploy.record(os.path.join(output_dir, rel), DELETED)
+            # hardlinked files count as unchanged for the sync even when
+            # edited in place, so compare them against the last build too
+            stamps_path = deploy_stamps_path(output_dir)
+            save_stamps(stamps_path, deploy.record_stamp_changes(static_outputs(output_dir), load_stamps(stamps_path)))
+            if assets:
+                written = write_fingerprinted(STATIC_DIR, output_dir, assets, link=args.link_static,
+                                              replacements=replacements)
+                for rel in written:
+                    deploy.record(os.path.join(output_dir, rel), ADDED)
+
+    for manifest, deploy in zip(manifests, deploys):
+        for path in remove_outputs(manifest.prune(sources)):
+            deploy.record(path, DELETED)
+
+    # generate pages for every markdown file under content/ whose inputs
+    # changed; a source is parsed once for all of its stale targets
+    search_state = load_search_state() if args.search_index else None
+    with stage("check_fresh"):
+        template_hash = layout_hash(args, assets)
+        pending = []
+        source_hashes = {}
+        for from_path in sources:
+            source_hash = hash_file(from_path)
+            outputs = [
+                (i, dest_path) for i, dest_path in page_outputs(from_path, targets)
+                if not manifests[i].is_fresh(from_path, dest_path, source_hash, template_hash, targets[i][0])
+            ]
+            if search_state is not None and search_state.get(from_path, {}).get("hash") != source_hash:
+                outputs = page_outputs(from_path, targets)  # not indexed yet
+            if outputs:
+                source_hashes[from_path] = source_hash
+                pending.append((from_path, outputs))
+
+    with stage("generate_pages"):
+        indexed = {} if search_state is not None else None
+        failures = generate_and_record(pending, manifests, args, jobs, source_hashes, profiler, assets, deploys,
+                                       indexed)
+    if search_state is not None:
+        with stage("search_index"):
+            update_search_index(search_state, indexed, sources, source_hashes, targets, deploys)
+    with stage("save_manifest"):
+        for manifest in manifests:
+            manifest.save()
+    if args.precompress:
+        with stage("precompress"):
+            precompress_outputs(targets, jobs, deploys)
+    with stage("deploy_manifest"):
+        for (_, output_dir), deploy in zip(targets, deploys):
+            path = deploy_manifest_path(output_dir)
+            data = deploy.save(path)
+            print(f"Deploy manifest written to {path}: {len(data['files'])} changed, "
+                  f"{len(data['deleted'])} deleted file(s).")
+        if args.changed_list:
+            write_changed_list(args.changed_list, [path for deploy in deploys for path in deploy.changed_paths()])
+    print(f"Generated {len(pending) - len(failures)} page(s), {len(sources) - len(pending)} unchanged.")
+    return manifests, failures
+
+def search_files(output_dir):
+    """Returns the paths, relative to `output_dir`, of the search index files it holds."""
+    search_dir = os.path.join(output_dir, SEARCH_DIR)
+    if not os.path.isdir(search_dir):
+        return []
+    return [os.path.join(SEARCH_DIR, name) for name in os.listdir(search_dir)]
+
+def update_search_index(state, indexed, sources, source_hashes, targets, deploys=None):
+    """
+    Stores the [title, terms] of the pages generated by this build (from
+    `indexed`) in the search `state`, drops pages whose source is gone,
+    saves the state and rewrites the search index of every target, whose
+    changes are recorded in `deploys` if given.
+    """
+    for from_path, (title, terms) in indexed.items():
+        source_hash = source_hashes.get(from_path) or hash_file(from_path)
+        state[from_path] = {"hash": source_hash, "title": title, "terms": terms}
+    current = set(sources)
+    for from_path in [from_path for from_path in state if from_path not in current]:
+        del state[from_path]
+    save_search_state(state)
+    for i, (basepath, output_dir) in enumerate(targets):
+        pages = [
+            (os.path.relpath(page_dest(from_path, CONTENT_DIR, output_dir), output_dir).replace(os.sep, "/"),
+             entry["title"], entry["terms"])
+            for from_path, entry in state.items()
+        ]
+        result = write_search_index(output_dir, pages, normalize_basepath(basepath))
+        if deploys is not None:
+            for path, status in result["files"].items():
+                deploys[i].record(path, status)
+            for path in result["deleted"]:
+                deploys[i].record(path, DELETED)
+        print(f"Search index: {result['pages']} page(s), {result['terms']} term(s); "
+              f"{len(result['files'])} file(s) written to {os.path.join(output_dir, SEARCH_DIR)}/.")
+
+def write_changed_list(path, changed):
+    """Writes the output files a build created or modified to `path`, one per line."""
+    with atomic_write(path) as f:
+        f.writelines(f"{changed_path}\n" for changed_path in sorted(set(changed)))
+    print(f"{len(set(changed))} changed output file(s) listed in {path}")
+
+def optimize_images(args, jobs):
+    """
+    With --optimize-images, optimizes the static PNGs (cached results are
+    reused) and returns the optimized file to ship per relative path;
+    otherwise returns None.
+    """
+    if not args.optimize_images:
+        return None
+    result = optimize_pngs(STATIC_DIR, jobs)
+    print(f"Optimized {len(result['optimized'])} PNG(s), {result['cached']} cached; "
+          f"{len(result['replacements'])} shipped smaller, saving {result['saved']} bytes.")
+    return result["replacements"]
+
+def precompress_outputs(targets, jobs, deploys=None):
+    """
+    Refreshes the compressed sidecars of every target's output directory;
+    sidecars written or removed are recorded in the target's DeployManifest
+    if `deploys` is given.
+    """
+    for i, (_, output_dir) in enumerate(targets):
+        result = precompress_directory(output_dir, jobs)
+        if deploys is not None:
+            for sidecar, status in result["sidecars"].items():
+                deploys[i].record(sidecar, status)
+            for sidecar in result["removed"]:
+                deploys[i].record(sidecar, DELETED)
+        print(f"Precompressed {len(result['compressed'])} file(s) in {output_dir}/ "
+              f"({'gzip and zstd' if zstd_available() else 'gzip'}), {result['unchanged']} unchanged, "
+              f"{len(result['removed'])} stale sidecar(s) removed.")
+
+def _is_under(path, directory):
+    return os.path.commonpath([os.path.abspath(path), os.path.abspath(directory)]) == os.path.abspath(directory)
+
+def sync_static(path, output_dir, args, replacements=None):
+    """
+    Syncs one changed static file, or every file of a static directory, into
+    `output_dir`, shipping the file in `replacements` instead where given.
+    """
+    replacements = replacements or {}
+    if os.path.isdir(path):
+        sources = [os.path.join(dirpath, filename) for dirpath, dirnames, filenames in os.walk(path)
+                   for filename in filenames]
+    else:
+        sources = [path]
+    for src in sources:
+        rel = os.path.relpath(src, STATIC_DIR)
+        if os.path.exists(src):
+            src = replacements.get(rel) or src
+        sync_file(src, os.path.join(output_dir, rel), checksum=args.checksum, link=args.link_static)
+
+def rebuild_changed(changed, manifests, args, jobs):
+    """
+    Rebuilds only the outputs affected by the changed paths reported by the
+    watcher, in every target: every page for a template change, one page per
+    markdown edit (or removal of its output when the source is gone), and
+    one file per static change. With --fingerprint or --image-sizes a
+    static change can alter every page, so they are all regenerated too.
+    Returns the list of page failures.
+    """
+    targets = build_targets(args)
+    # fingerprints name the bytes actually shipped, so images are optimized first
+    replacements = optimize_images(args, jobs) if args.fingerprint else None
+    assets = build_asset_map(STATIC_DIR, replacements) if args.fingerprint else None
+    template_changed = False
+    pages = {}
+    for path in sorted(changed):
+        path = os.path.normpath(path)
+        if os.path.abspath(path) == os.path.abspath(TEMPLATE_PATH):
+            template_changed = True
+        elif _is_under(path, CONTENT_DIR):
+            if os.path.isdir(path):
+                for from_path, _ in find_pages(path, OUTPUT_DIR):
+                    pages[from_path] = page_outputs(from_path, targets)
+            elif os.path.isfile(path):
+                if path.endswith('.md'):
+                    pages[path] = page_outputs(path, targets)
+            else:
+                # a removed file or directory: drop every page generated from it
+                for manifest in manifests:
+                    remove_outputs(manifest.forget(
+                        source for source in manifest.entries if source == path or _is_under(source, path)
+                    ))
+        elif _is_under(path, STATIC_DIR):
+            if args.optimize_images and replacements is None:
+                replacements = optimize_images(args, jobs)
+            for _, output_dir in targets:
+                sync_static(path, output_dir, args, replacements)
+                if assets is not None:
+                    write_fingerprinted(STATIC_DIR, output_dir, assets, link=args.link_static,
+                                        replacements=replacements)
+            template_changed = template_changed or assets is not None or args.image_sizes
+
+    if template_changed:
+        pages = {from_path: page_outputs(from_path, targets) for from_path, _ in find_pages(CONTENT_DIR, OUTPUT_DIR)}
+    indexed = {} if args.search_index else None
+    failures = generate_and_record(sorted(pages.items()), manifests, args, jobs, assets=assets, search=indexed)
+    if indexed is not None:
+        sources = [from_path for from_path, _ in find_pages(CONTENT_DIR, OUTPUT_DIR)]
+        update_search_index(load_search_state(), indexed, sources, {}, targets)
+    for manifest in manifests:
+        manifest.save()
+    if args.precompress:
+        precompress_outputs(targets, jobs)
+    print(f"Rebuilt {len(pages) - len(failures)} page(s).")
+    return failures
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.target:
+        for basepath, output_dir in args.target:
+            print(f"Target: base path {basepath} into {output_dir}/")
+    else:
+        print(f"Base path for the site: {args.basepath}")
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+
+    profiler = Profiler(trace_memory=True) if args.profile else None
+    manifests, failures = build(args, jobs, profiler)
+    report_failures(failures)
+    if profiler is not None:
+        profiler.write_json(f"{args.profile}.json")
+        profiler.write_chrome_trace(f"{args.profile}.trace.json")
+        print(profiler.format_summary(args.profile_top))
+        print(f"Profile written to {args.profile}.json and {args.profile}.trace.json")
+        profiler.close()
+
+    if args.watch:
+        def on_change(changed):
+            report_failures(rebuild_changed(changed, manifests, args, jobs))
+        watch([CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH], on_change)
+    elif failures:
+        sys.exit(f"{len(failures)} page(s) failed to generate.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,3 +1,6 @@
+import io
+import mmap
+import re
 from enum import Enum
 
 class BlockType(Enum):
@@ -24,6 +27,131 @@ def markdown_to_blocks(text: str) -> list[str]:
     parts = [p.strip() for p in text.split("\n\n")]
     return [p for p in parts if p != ""]
 
+def iter_lines(source):
+    """
+    Yields the lines (with line endings) of `source`: a string, a text or
+    binary file object, or an mmap. Byte lines are yielded undecoded, with
+    CRLF endings normalized to LF as text-mode reading would.
+    """
+    if isinstance(source, str):
+        yield from io.StringIO(source)
+        return
+    lines = iter(source.readline, b"") if isinstance(source, mmap.mmap) else source
+    for line in lines:
+        if isinstance(line, bytes) and line.endswith(b"\r\n"):
+            line = line[:-2] + b"\n"
+        yield line
+
+def iter_blocks(source):
+    """
+    Lazily yields the same blocks as markdown_to_blocks, reading `source`
+    (a string, a text or binary file object, or an mmap) one line at a time.
+
+    Only the lines of the current block are held in memory, so arbitrarily
+    large documents can be split with bounded memory. A block ends at an
+    empty line, which matches splitting on "\n\n": any extra splits at runs
+    of empty lines only produce empty blocks, which are dropped. Binary
+    sources are decoded as UTF-8 block by block.
+    """
+    buffer = []
+    first = True
+    for line in iter_lines(source):
+        # an empty line after the first one means "\n\n" in the document
+        if not first and line in ("\n", b"\n"):
+            block = _join_block(buffer)
+            if block:
+                yield block
+            buffer = []
+        else:
+            buffer.append(line)
+        first = False
+    block = _join_block(buffer)
+    if block:
+        yield block
+
+def _join_block(lines) -> str:
+    if not lines:
+        return ""
+    if isinstance(lines[0], bytes):
+        return b"".join(lines).decode("utf-8").strip()
+    return "".join(lines).strip()
+
+HEADING_PREFIX = re.compile(r"#{1,6}\s+")
+QUOTE_PREFIX = re.compile(r">\s*")
+
+def _indent(line: str) -> int:
+    """Returns the length of the leading whitespace of `line`."""
+    if line[:1].isspace():
+        return len(line) - len(line.lstrip())
+    return 0
+
+def classify_block(block: str):
+    """
+    Classifies a markdown block in a single pass over its lines.
+
+    Returns (block_type, lines, offsets): `lines` is block.splitlines() and
+    `offsets[i]` is the index in lines[i] where the content starts, after
+    the indentation and the block marker ("- ", "N. ", "> ", or the heading
+    "#"s and following whitespace). For headings only the first line is the
+    heading, so `offsets` has a single entry; for paragraphs and code blocks
+    `offsets` is None because their lines carry no marker.
+
+    The first non-blank character of the block picks the only possible
+    candidate, so each block is validated against at most one type. See
+    block_to_block_type for the rules.
+    """
+    lines = block.splitlines()
+    if not lines:
+        return BlockType.PARAGRAPH, lines, None
+
+    first = lines[0]
+    indent = _indent(first)
+    marker = first[indent:indent + 1]
+
+    if marker == "#":
+        m = HEADING_PREFIX.match(first, indent)
+        if m:
+            return BlockType.HEADING, lines, [m.end()]
+
+    elif marker == "`":
+        if len(lines) >= 2 and first.startswith("```", indent):
+            last = lines[-1]
+            if last.startswith("```", _indent(last)):
+                return BlockType.CODE, lines, None
+
+    elif marker == "-":
+        offsets = []
+        for line in lines:
+            start = _indent(line)
+            if not line.startswith("- ", start):
+                break
+            offsets.append(start + 2)
+        else:
+            return BlockType.UNORDERED_LIST, lines, offsets
+
+    elif marker == "1":
+        offsets = []
+        for number, line in enumerate(lines, 1):
+            start = _indent(line)
+            digits = str(number)
+            if not (line.startswith(digits, start) and line.startswith(". ", start + len(digits))):
+                break
+            offsets.append(start + len(digits) + 2)
+        else:
+            return BlockType.ORDERED_LIST, lines, offsets
+
+    elif marker == ">":
+        offsets = []
+        for line in lines:
+            m = QUOTE_PREFIX.match(line, _indent(line))
+            if m is None:
+                break
+            offsets.append(m.end())
+        else:
+            return BlockType.QUOTE, lines, offsets
+
+    return BlockType.PARAGRAPH, lines, None
+
 def block_to_block_type(block: str) -> BlockType:
     """
     Determines the BlockType of a given markdown block string.
@@ -37,57 +165,86 @@ def block_to_block_type(block: str) -> BlockType:
     - Quotes start with '>'.
     - All other blocks are considered paragraphs.
     """
-    # Treat empty or whitespace-only as paragraph
-    if block.strip() == "":
-        return BlockType.PARAGRAPH
+    return classify_block(block)[0]
 
-    import re
+# Appended to a render variant for the cache entries holding a block's text.
+TEXT_VARIANT = "\0text"
 
-    lines = block.splitlines()
-    stripped = [ln.lstrip() for ln in lines]
-    first = stripped[0]
+def render_variant(markdown: str, minify: bool = False, images=None) -> str:
+    """
+    Describes the rendering options and external files, besides the text
+    itself, that the HTML of `markdown` depends on; part of cache keys.
+    """
+    variant = "min" if minify else ""
+    if images is not None:
+        variant = f"{variant}\0img\0{images.stamp(markdown)}"
+    return variant
+
+def markdown_to_html_node(markdown, cache=None, *, minify=False, images=None, search_text=None):
+    """
+    Convert a full markdown document into a single parent HTMLNode (<div>),
+    whose children are block-level HTML nodes corresponding to the markdown.
 
-    # Headings: 1-6 '#' followed by a space
-    if re.match(r"^#{1,6}\s+", first):
-        return BlockType.HEADING
+    `markdown` is usually a string; a file object or mmap is also accepted
+    and read block by block through iter_blocks, so the source text never
+    has to be held in memory as a whole.
 
-    # Multiline fenced code block: starts with ``` and ends with ```
-    if first.startswith("```") and stripped[-1].startswith("```") and len(lines) >= 2:
-        return BlockType.CODE
+    With a FragmentCache as `cache`, each block is looked up by its text and
+    type first; blocks seen before (on any page) are inserted as a
+    RawHTMLNode instead of being parsed again, and newly parsed blocks are
+    rendered once and stored. Cached fragments keep root-relative URLs
+    unprefixed, so the basepath is still applied when the page is rendered.
 
-    # Unordered list: every line must start with '- '
-    if all(s.startswith("- ") for s in stripped) and len(stripped) >= 1:
-        return BlockType.UNORDERED_LIST
+    With `minify`, each block's nodes go through minify.minify_tree before
+    they are cached, and cache keys are kept apart from unminified ones.
+    `images` is an optional image_size.ImageSizer for <img> attributes; the
+    files a block's images point at then become part of its cache key.
 
-    # Ordered list: use simple sequential prefix checks: 1., 2., 3., ...
-    is_ordered = True
-    for i, s in enumerate(stripped):
-        if not s.startswith(f"{i+1}. "):
-            is_ordered = False
-            break
-    if is_ordered:
-        return BlockType.ORDERED_LIST
+    If `search_text` is a list, the text of every TextNode (what the search index
+    is built from) is appended to it in document order. With a cache, each
+    block's text is cached next to its HTML, so hits still provide it.
+    """
+    from htmlnode import ParentNode, LeafNode
 
-    # Quote: every line must start with '>' (possibly with trailing space)
-    if all(s.startswith(">") for s in stripped) and len(stripped) >= 1:
-        return BlockType.QUOTE
+    top_children = list(iter_block_nodes(markdown, cache, minify=minify, images=images, search_text=search_text))
+    # If there are no blocks (empty document) ensure the div still has
+    # a child so ParentNode.to_html() can render an empty div rather than
+    # raising. An empty leaf with empty value renders as empty content.
+    if not top_children:
+        top_children = [LeafNode(None, "")]
 
-    return BlockType.PARAGRAPH
+    # Wrap all blocks in a single div
+    return ParentNode("div", top_children)
 
-def markdown_to_html_node(markdown: str):
+def iter_markdown_html(markdown, basepath="/", cache=None, *, minify=False, images=None, search_text=None):
     """
-    Convert a full markdown document into a single parent HTMLNode (<div>),
-    whose children are block-level HTML nodes corresponding to the markdown.
+    Yields the HTML of markdown_to_html_node(markdown, ...) rendered with
+    `basepath`, block by block: each block's nodes are rendered as soon as
+    iter_blocks produces it and dropped afterwards, so with a file or mmap
+    source memory stays bounded by the largest block, not the document.
+    """
+    yield "<div>"
+    for node in iter_block_nodes(markdown, cache, minify=minify, images=images, search_text=search_text):
+        yield from node.iter_html(basepath)
+    yield "</div>"
+
+def iter_block_nodes(markdown, cache=None, *, minify=False, images=None, search_text=None):
+    """
+    Yields the top-level nodes of markdown_to_html_node one block at a time;
+    the arguments are the same.
     """
     # Delayed imports to avoid cycles
-    from htmlnode import ParentNode, LeafNode
+    from htmlnode import ParentNode, LeafNode, RawHTMLNode, html_parts
     from textnode import text_node_to_html_node
     from splitnodes import text_to_text_node
+    from minify import minify_tree
 
     def text_to_children(text: str):
         # Collapse internal newlines into spaces for inline parsing (except for code blocks)
         collapsed = " ".join(line.strip() for line in text.splitlines())
         text_nodes = text_to_text_node(collapsed)
+        if search_text is not None:
+            search_text.extend(tn.text for tn in text_nodes if tn.text)
         children = []
         for tn in text_nodes:
             # Use presentation tags for markdown rendering: <b> and <i>
@@ -96,36 +253,56 @@ def markdown_to_html_node(markdown: str):
             elif tn.text_type.name == "ITALIC":
                 children.append(LeafNode("i", tn.text))
             else:
-                children.append(text_node_to_html_node(tn))
+                children.append(text_node_to_html_node(tn, images))
         # Ensure there's at least one child (empty paragraph)
         if not children:
             children = [LeafNode(None, "")]
         return children
 
-    top_children = []
-    blocks = markdown_to_blocks(markdown)
+    blocks = markdown_to_blocks(markdown) if isinstance(markdown, str) else iter_blocks(markdown)
+
+    def code_node(lines):
+        # Remove the opening and closing fence lines and keep content verbatim
+        inner = "\n".join(lines[1:-1])
+        if inner != "":
+            inner = inner + "\n"
+        return ParentNode("pre", [LeafNode("code", inner)])
+
+    def list_items(lines, offsets):
+        return [ParentNode("li", text_to_children(ln[start:])) for ln, start in zip(lines, offsets)]
+
+    def quote_text(lines, offsets):
+        # the classifier's offsets already skip the '>' and following spaces
+        return " ".join(ln[start:] for ln, start in zip(lines, offsets))
 
     for blk in blocks:
-        btype = block_to_block_type(blk)
-        lines = blk.splitlines()
+        btype, lines, offsets = classify_block(blk)
+
+        if cache is not None:
+            variant = render_variant(blk, minify, images)
+            key = cache.key(blk, btype, variant)
+            text_key = cache.key(blk, btype, variant + TEXT_VARIANT) if search_text is not None else None
+            parts = cache.get(key)
+            # the text only accompanies the HTML, so it is not counted again
+            block_text = cache.get(text_key, count=False) if parts is not None and text_key is not None else None
+            if parts is not None and (text_key is None or block_text is not None):
+                if block_text is not None:
+                    search_text.extend(block_text)
+                yield RawHTMLNode(parts)
+                continue
+        nodes = []
+        first_text = len(search_text) if search_text is not None else 0
 
         if btype == BlockType.PARAGRAPH:
             children = text_to_children(blk)
-            top_children.append(ParentNode("p", children))
+            nodes.append(ParentNode("p", children))
 
         elif btype == BlockType.HEADING:
-            # Use first line only for heading, strip leading #'s
-            first = lines[0].lstrip()
-            import re
-            m = re.match(r"^(#{1,6})\s+(.*)$", first)
-            if m:
-                level = len(m.group(1))
-                content = m.group(2)
-            else:
-                level = 1
-                content = first
-            children = text_to_children(content)
-            top_children.append(ParentNode(f"h{level}", children))
+            # Use first line only for heading; the offset skips the #'s
+            first = lines[0]
+            level = len(first[:offsets[0]].strip())
+            children = text_to_children(first[offsets[0]:])
+            nodes.append(ParentNode(f"h{level}", children))
             # If the block contains additional lines (e.g., a following
             # quote or list on the next line without a blank line), process
             # the remainder as its own block so '# heading\n> quote' becomes
@@ -134,108 +311,42 @@ def markdown_to_html_node(markdown: str):
                 remainder = "\n".join(lines[1:]).strip()
                 if remainder != "":
                     # Determine its type and process similarly to main loop
-                    btype2 = block_to_block_type(remainder)
-                    lines2 = remainder.splitlines()
+                    btype2, lines2, offsets2 = classify_block(remainder)
                     if btype2 == BlockType.QUOTE:
-                        parts = []
-                        for ln in lines2:
-                            s = ln.lstrip()
-                            if s.startswith(">"):
-                                parts.append(s[1:].lstrip())
-                            else:
-                                parts.append(s)
-                        content2 = " ".join(parts)
-                        children2 = text_to_children(content2)
-                        top_children.append(ParentNode("blockquote", [ParentNode("p", children2)]))
-                    elif btype2 == BlockType.PARAGRAPH:
-                        top_children.append(ParentNode("p", text_to_children(remainder)))
+                        children2 = text_to_children(quote_text(lines2, offsets2))
+                        nodes.append(ParentNode("blockquote", [ParentNode("p", children2)]))
                     elif btype2 == BlockType.UNORDERED_LIST:
-                        items = []
-                        for ln in lines2:
-                            s = ln.lstrip()
-                            if s.startswith("- "):
-                                item_text = s[2:]
-                            else:
-                                item_text = s
-                            items.append(ParentNode("li", text_to_children(item_text)))
-                        top_children.append(ParentNode("ul", items))
+                        nodes.append(ParentNode("ul", list_items(lines2, offsets2)))
                     elif btype2 == BlockType.ORDERED_LIST:
-                        items = []
-                        for ln in lines2:
-                            s = ln.lstrip()
-                            parts = s.split('. ', 1)
-                            item_text = parts[1] if len(parts) > 1 else s
-                            items.append(ParentNode("li", text_to_children(item_text)))
-                        top_children.append(ParentNode("ol", items))
-                    elif btype2 == BlockType.HEADING:
-                        # Rare: nested heading on same block, fall back to paragraph
-                        top_children.append(ParentNode("p", text_to_children(remainder)))
+                        nodes.append(ParentNode("ol", list_items(lines2, offsets2)))
                     elif btype2 == BlockType.CODE:
-                        # treat as code block
-                        if len(lines2) >= 2 and lines2[0].lstrip().startswith("```") and lines2[-1].lstrip().startswith("```"):
-                            inner2 = "\n".join(lines2[1:-1])
-                            if inner2 != "":
-                                inner2 = inner2 + "\n"
-                        else:
-                            inner2 = "\n".join(lines2)
-                            if inner2 != "":
-                                inner2 = inner2 + "\n"
-                        code_node2 = LeafNode("code", inner2)
-                        top_children.append(ParentNode("pre", [code_node2]))
+                        nodes.append(code_node(lines2))
+                    else:
+                        # paragraphs, and the rare nested heading on the same
+                        # block, become a paragraph
+                        nodes.append(ParentNode("p", text_to_children(remainder)))
+
         elif btype == BlockType.CODE:
-            # Remove the opening and closing fence lines and keep content verbatim
-            if len(lines) >= 2 and lines[0].lstrip().startswith("```") and lines[-1].lstrip().startswith("```"):
-                inner = "\n".join(lines[1:-1])
-                if inner != "":
-                    inner = inner + "\n"
-            else:
-                inner = "\n".join(lines)
-                if inner != "":
-                    inner = inner + "\n"
-            code_node = LeafNode("code", inner)
-            top_children.append(ParentNode("pre", [code_node]))
+            nodes.append(code_node(lines))
 
         elif btype == BlockType.QUOTE:
-            # Strip leading > and optional space from each line
-            parts = []
-            for ln in lines:
-                s = ln.lstrip()
-                if s.startswith(">"):
-                    parts.append(s[1:].lstrip())
-                else:
-                    parts.append(s)
-            content = " ".join(parts)
-            children = text_to_children(content)
-            top_children.append(ParentNode("blockquote", children))
+            children = text_to_children(quote_text(lines, offsets))
+            nodes.append(ParentNode("blockquote", children))
 
         elif btype == BlockType.UNORDERED_LIST:
-            items = []
-            for ln in lines:
-                s = ln.lstrip()
-                if s.startswith("- "):
-                    item_text = s[2:]
-                else:
-                    item_text = s
-                li_children = text_to_children(item_text)
-                items.append(ParentNode("li", li_children))
-            top_children.append(ParentNode("ul", items))
+            nodes.append(ParentNode("ul", list_items(lines, offsets)))
 
         elif btype == BlockType.ORDERED_LIST:
-            items = []
-            for ln in lines:
-                s = ln.lstrip()
-                # Remove leading 'N. '
-                parts = s.split('. ', 1)
-                item_text = parts[1] if len(parts) > 1 else s
-                li_children = text_to_children(item_text)
-                items.append(ParentNode("li", li_children))
-            top_children.append(ParentNode("ol", items))
+            nodes.append(ParentNode("ol", list_items(lines, offsets)))
 
-    # If there are no blocks (empty document) ensure the div still has
-    # a child so ParentNode.to_html() can render an empty div rather than
-    # raising. An empty leaf with empty value renders as empty content.
-    if not top_children:
-        top_children = [LeafNode(None, "")]
-
-    # Wrap all blocks in a single div
-    return ParentNode("div", top_children)
+        if minify:
+            for node in nodes:
+                minify_tree(node)
+        if cache is not None:
+            # a heading block can produce several top-level nodes
+            parts = html_parts(nodes)
+            cache.put(key, parts)
+            if text_key is not None:
+                cache.put(text_key, search_text[first_text:])
+            nodes = [RawHTMLNode(parts)]
+        yield from nodes
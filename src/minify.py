@@ -0,0 +1,123 @@
+import re
+from htmlnode import LeafNode, ParentNode, RawHTMLNode, URL_ATTRIBUTES, UNQUOTED_VALUE
+
+# Elements whose content is whitespace-sensitive or not HTML; never minified.
+PRESERVE_TAGS = frozenset(("pre", "code", "textarea", "script", "style"))
+# Whitespace-only text next to these tags does not render and can be dropped.
+BLOCK_TAGS = frozenset((
+    "!doctype", "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript",
+    "div", "article", "section", "header", "footer", "main", "nav", "aside", "p", "h1", "h2", "h3",
+    "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd", "blockquote", "pre", "hr", "table", "thead",
+    "tbody", "tfoot", "tr", "th", "td", "figure", "figcaption", "form", "fieldset", "br",
+))
+
+WHITESPACE = re.compile(r"\s+")
+COMMENT = re.compile(r"<!--(?!\[).*?-->", re.S)
+TOKEN = re.compile(r"<!--.*?-->|<[!/]?[A-Za-z][^>]*>", re.S)
+TAG_NAME = re.compile(r"<(/?)([!A-Za-z][^\s/>]*)")
+ATTRIBUTE = re.compile(r'\s+([^\s=/>"\']+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+
+def collapse_text(text: str) -> str:
+    """Drops comments and collapses whitespace runs to one space."""
+    return WHITESPACE.sub(" ", COMMENT.sub("", text))
+
+def minify_tree(node):
+    """
+    Minifies a node tree in place: text leaves get collapse_text, and
+    opening tags drop optional attribute quotes. Everything under a
+    PRESERVE_TAGS element (code blocks, inline code) is left untouched, as
+    are RawHTMLNode fragments, which come from caches of minified trees.
+    Returns `node`.
+    """
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, RawHTMLNode):
+            continue
+        if current.tag in PRESERVE_TAGS:
+            if current.props:
+                current.unquote_attributes()
+            continue
+        if current.tag is not None and current.props:
+            current.unquote_attributes()
+        if isinstance(current, ParentNode):
+            stack.extend(current.children)
+        elif isinstance(current, LeafNode) and isinstance(current.value, str):
+            current.value = collapse_text(current.value)
+    return node
+
+def _minify_tag(tag: str) -> str:
+    m = TAG_NAME.match(tag)
+    if m is None or m.group(1) or m.group(2).startswith("!"):
+        return WHITESPACE.sub(" ", tag)
+    out = [f"<{m.group(2)}"]
+    end = len(tag) - 1
+    self_closing = tag.endswith("/>")
+    if self_closing:
+        end -= 1
+    quoted_last = True
+    for attr in ATTRIBUTE.finditer(tag, m.end(), end):
+        name = attr.group(1)
+        value = next((v for v in attr.group(2, 3, 4) if v is not None), None)
+        if value is None:
+            out.append(f" {name}")
+            quoted_last = True
+        elif name.lower() not in URL_ATTRIBUTES and UNQUOTED_VALUE.match(value):
+            out.append(f" {name}={value}")
+            quoted_last = False
+        else:
+            out.append(f' {name}="{value}"')
+            quoted_last = True
+    if self_closing:
+        out.append("/>" if quoted_last else " />")
+    else:
+        out.append(">")
+    return "".join(out)
+
+def minify_html(text: str) -> str:
+    """
+    Minifies an HTML document such as the page template: comments are
+    dropped (conditional comments are kept), whitespace runs in text collapse
+    to one space, whitespace-only text next to a block-level tag is removed,
+    and attribute quotes that are not needed are dropped. The content of
+    PRESERVE_TAGS elements is copied verbatim.
+    """
+    tokens = []
+    pos = 0
+    for m in TOKEN.finditer(text):
+        if m.start() > pos:
+            tokens.append(text[pos:m.start()])
+        tokens.append(m.group(0))
+        pos = m.end()
+    if pos < len(text):
+        tokens.append(text[pos:])
+
+    def tag_name(token):
+        m = TAG_NAME.match(token) if token.startswith("<") and not token.startswith("<!--") else None
+        return m.group(2).lower() if m else None
+
+    out = []
+    preserve = None  # name of the PRESERVE_TAGS element we are inside
+    for i, token in enumerate(tokens):
+        name = tag_name(token)
+        if preserve is not None:
+            out.append(token)
+            if name == preserve and token.startswith("</"):
+                preserve = None
+            continue
+        if token.startswith("<!--"):
+            if token.startswith("<!--["):
+                out.append(token)
+        elif name is not None:
+            out.append(_minify_tag(token))
+            if name in PRESERVE_TAGS and not token.startswith("</") and not token.endswith("/>"):
+                preserve = name
+        else:
+            collapsed = collapse_text(token)
+            if collapsed == " ":
+                before = tag_name(tokens[i - 1]) if i > 0 else "html"
+                after = tag_name(tokens[i + 1]) if i + 1 < len(tokens) else "html"
+                if before in BLOCK_TAGS or after in BLOCK_TAGS or i == 0 or i + 1 == len(tokens):
+                    continue
+            out.append(collapsed)
+    return "".join(out)
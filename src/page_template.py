@@ -0,0 +1,139 @@
+import os
+import re
+from minify import minify_html
+
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+DEFAULT_SLOTS = ("Title", "Content")
+# Root-relative href/src attributes; the final '/' is what a basepath replaces.
+ROOT_URL_ATTRIBUTE = re.compile(r'\b(?:href|src)="/(?!/)')
+
+class CompiledTemplate:
+    """
+    A page template parsed once into static chunks and named slots.
+
+    The template text is split on `{{ Name }}` placeholders for the names in
+    `slots`; any other placeholder is kept as static text. Rendering joins the
+    static chunks with the slot values in a single pass instead of running a
+    full-document `str.replace` per slot. The chunks are also kept pre-encoded
+    to UTF-8, so iter_render_bytes only has to encode the slot values.
+    """
+
+    def __init__(self, text: str, slots=DEFAULT_SLOTS):
+        self.text = text
+        self.chunks = []
+        self.slot_names = []
+        pos = 0
+        for m in SLOT_PATTERN.finditer(text):
+            if m.group(1) not in slots:
+                continue
+            self.chunks.append(text[pos:m.start()])
+            self.slot_names.append(m.group(1))
+            pos = m.end()
+        self.chunks.append(text[pos:])
+        self.encoded_chunks = [chunk.encode("utf-8") for chunk in self.chunks]
+        self.slots = slots
+        self._variants = {}
+        self._minified = None
+
+    def minified(self) -> "CompiledTemplate":
+        """Returns this template run through minify.minify_html, compiled once and kept."""
+        if self._minified is None:
+            self._minified = CompiledTemplate(minify_html(self.text), self.slots)
+        return self._minified
+
+    def for_basepath(self, basepath) -> "CompiledTemplate":
+        """
+        Returns this template with `basepath` (with a trailing '/') applied to
+        its root-relative href/src attributes. `basepath` may also be any
+        hashable object with a join(parts) method, such as an AssetRewriter.
+        Each variant is compiled once and kept, so the template's own links
+        are rewritten once per build rather than once per page.
+        """
+        if basepath == "/":
+            return self
+        variant = self._variants.get(basepath)
+        if variant is None:
+            # split the text where the leading '/' of each URL is, the same
+            # form HTMLNode.open_tag_parts uses
+            parts = []
+            pos = 0
+            for m in ROOT_URL_ATTRIBUTE.finditer(self.text):
+                parts.append(self.text[pos:m.end() - 1])
+                pos = m.end()
+            parts.append(self.text[pos:])
+            variant = self._variants[basepath] = CompiledTemplate(basepath.join(parts), self.slots)
+        return variant
+
+    def render(self, **values) -> str:
+        """Fills every slot with `values[name]` (empty if missing) and returns the page."""
+        parts = [self.chunks[0]]
+        for name, chunk in zip(self.slot_names, self.chunks[1:]):
+            parts.append(values.get(name, ""))
+            parts.append(chunk)
+        return "".join(parts)
+
+    def iter_render(self, **values):
+        """
+        Yields the page as fragments: static chunks interleaved with slot
+        values. A value may be a string or an iterable of string fragments
+        (such as HTMLNode.iter_html()), which is streamed through unjoined.
+        """
+        if self.chunks[0]:
+            yield self.chunks[0]
+        for name, chunk in zip(self.slot_names, self.chunks[1:]):
+            value = values.get(name, "")
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+            if chunk:
+                yield chunk
+
+    def write(self, out, **values):
+        """Streams the rendered page into `out` without building it in memory."""
+        out.writelines(self.iter_render(**values))
+
+    def iter_render_bytes(self, **values):
+        """
+        Like iter_render(), but yields UTF-8 bytes for writing: the static
+        chunks come pre-encoded and only the slot fragments are encoded.
+        """
+        if self.encoded_chunks[0]:
+            yield self.encoded_chunks[0]
+        for name, chunk in zip(self.slot_names, self.encoded_chunks[1:]):
+            value = values.get(name, "")
+            if isinstance(value, str):
+                yield value.encode("utf-8")
+            else:
+                for fragment in value:
+                    yield fragment.encode("utf-8")
+            if chunk:
+                yield chunk
+
+    def __eq__(self, other):
+        if not isinstance(other, CompiledTemplate):
+            return NotImplemented
+        return self.chunks == other.chunks and self.slot_names == other.slot_names
+
+    def __repr__(self):
+        return f"CompiledTemplate({self.text!r})"
+
+# Compiled templates by path, validated against the file's mtime and size so
+# an edited template is picked up without restarting the process.
+_template_cache = {}
+
+def load_template(path: str) -> CompiledTemplate:
+    """
+    Returns the compiled template for `path`, reading and parsing the file
+    only the first time it is requested (or after it changed on disk). All
+    pages generated in one process share the same CompiledTemplate.
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _template_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, 'r') as f:
+        template = CompiledTemplate(f.read())
+    _template_cache[path] = (key, template)
+    return template
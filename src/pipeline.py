@@ -0,0 +1,76 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Default number of concurrent reads and writes; they mostly wait on the
+# disk (or network filesystem), so more than the CPU count pays off.
+IO_TASKS = 8
+
+
+def run_pipeline(items, read, render, write, jobs=1, readers=IO_TASKS, writers=IO_TASKS, queue_size=None):
+    """
+    Runs every (key, item) pair in `items` through three overlapping
+    stages: `read(item)` and `write(rendered)` in a thread pool and
+    `render(value)` in a pool of `jobs` worker processes (one thread when
+    `jobs` is 1, which still overlaps with the I/O). While page N renders,
+    page N+1 is read and page N-1 written.
+
+    The stages are joined by bounded queues of `queue_size` entries
+    (default: twice the number of consumers), so a slow stage applies
+    backpressure: readers stop reading ahead and renderers stop rendering
+    ahead instead of holding the whole site in memory. `render` must be a
+    picklable module-level function when `jobs` > 1.
+
+    Returns [(key, outcome)] in the order of `items`, where outcome is the
+    value `write` returned, or the exception raised by whichever stage
+    failed for that item; the other items are unaffected.
+    """
+    return asyncio.run(_run_pipeline(list(items), read, render, write, jobs, readers, writers, queue_size))
+
+
+async def _run_pipeline(items, read, render, write, jobs, readers, writers, queue_size):
+    loop = asyncio.get_running_loop()
+    outcomes = {}
+    pending = iter(items)
+    read_queue = asyncio.Queue(queue_size or 2 * jobs)
+    write_queue = asyncio.Queue(queue_size or 2 * writers)
+
+    async def reader(io_pool):
+        # readers share one iterator; the event loop runs one at a time
+        for key, item in pending:
+            try:
+                value = await loop.run_in_executor(io_pool, read, item)
+            except Exception as e:
+                outcomes[key] = e
+                continue
+            await read_queue.put((key, value))
+
+    async def renderer(render_pool):
+        while (entry := await read_queue.get()) is not None:
+            key, value = entry
+            try:
+                rendered = await loop.run_in_executor(render_pool, render, value)
+            except Exception as e:
+                outcomes[key] = e
+                continue
+            await write_queue.put((key, rendered))
+
+    async def writer(io_pool):
+        while (entry := await write_queue.get()) is not None:
+            key, rendered = entry
+            try:
+                outcomes[key] = await loop.run_in_executor(io_pool, write, rendered)
+            except Exception as e:
+                outcomes[key] = e
+
+    render_pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else ThreadPoolExecutor(max_workers=1)
+    with ThreadPoolExecutor(max_workers=readers + writers) as io_pool, render_pool:
+        writer_tasks = [asyncio.create_task(writer(io_pool)) for _ in range(writers)]
+        renderer_tasks = [asyncio.create_task(renderer(render_pool)) for _ in range(jobs)]
+        await asyncio.gather(*(reader(io_pool) for _ in range(readers)))
+        for _ in renderer_tasks:
+            await read_queue.put(None)
+        await asyncio.gather(*renderer_tasks)
+        for _ in writer_tasks:
+            await write_queue.put(None)
+        await asyncio.gather(*writer_tasks)
+    return [(key, outcomes[key]) for key, _ in items]
@@ -0,0 +1,148 @@
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from atomic_file import atomic_write
+from build_manifest import hash_file
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Metadata chunks an optimized PNG drops: text, modification time and
+# physical pixel size never change how the image is displayed. Every other
+# chunk is kept, including tRNS and the color-management chunks (sRGB,
+# gAMA, cHRM, iCCP), which do.
+STRIP_CHUNKS = frozenset((b"tEXt", b"zTXt", b"iTXt", b"tIME", b"pHYs"))
+# Animated PNGs keep frames in fdAT chunks; those files are left alone.
+ANIMATION_CHUNKS = frozenset((b"acTL", b"fcTL", b"fdAT"))
+DEFLATE_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+# Optimized files by source content hash. Bump the version when
+# optimize_png changes output so stale results are not reused.
+PNG_CACHE_DIR = os.path.join('.cache', 'png-v2')
+
+def read_chunks(data: bytes) -> list[tuple[bytes, bytes]]:
+    """
+    Splits a PNG file into (type, data) chunks, checking the signature,
+    chunk lengths and CRCs. Raises ValueError for anything malformed.
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("not a PNG file")
+    chunks = []
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        if pos + 8 > len(data):
+            raise ValueError("truncated chunk header")
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        end = pos + 8 + length
+        if end + 4 > len(data):
+            raise ValueError(f"truncated {chunk_type!r} chunk")
+        body = data[pos + 8:end]
+        if zlib.crc32(chunk_type + body) != struct.unpack(">I", data[end:end + 4])[0]:
+            raise ValueError(f"bad CRC in {chunk_type!r} chunk")
+        chunks.append((chunk_type, body))
+        pos = end + 4
+        if chunk_type == b"IEND":
+            break
+    if not chunks or chunks[0][0] != b"IHDR" or chunks[-1][0] != b"IEND":
+        raise ValueError("missing IHDR or IEND chunk")
+    return chunks
+
+def _chunk(chunk_type: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + chunk_type + body + struct.pack(">I", zlib.crc32(chunk_type + body))
+
+def _deflate(raw: bytes) -> bytes:
+    best = None
+    for strategy in DEFLATE_STRATEGIES:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, zlib.MAX_WBITS, 9, strategy)
+        packed = compressor.compress(raw) + compressor.flush()
+        if best is None or len(packed) < len(best):
+            best = packed
+    return best
+
+def optimize_png(data: bytes) -> bytes:
+    """
+    Losslessly shrinks a PNG: the image data is inflated and deflated again
+    at maximum zlib level (keeping the smaller of two strategies) into one
+    IDAT chunk, and the metadata chunks in STRIP_CHUNKS are dropped. Pixels
+    and color management are untouched. Returns `data` itself if the result is not smaller, or if the
+    file is animated or malformed.
+    """
+    try:
+        chunks = read_chunks(data)
+        if any(chunk_type in ANIMATION_CHUNKS for chunk_type, _ in chunks):
+            return data
+        raw = zlib.decompress(b"".join(body for chunk_type, body in chunks if chunk_type == b"IDAT"))
+    except (ValueError, zlib.error):
+        return data
+    out = [PNG_SIGNATURE]
+    idat_written = False
+    for chunk_type, body in chunks:
+        if chunk_type == b"IDAT":
+            if not idat_written:
+                out.append(_chunk(b"IDAT", _deflate(raw)))
+                idat_written = True
+        elif chunk_type not in STRIP_CHUNKS:
+            out.append(_chunk(chunk_type, body))
+    optimized = b"".join(out)
+    return optimized if len(optimized) < len(data) else data
+
+def optimize_file(path: str, cache_path: str) -> dict:
+    """
+    Optimizes the PNG at `path` and, if that made it smaller, writes the
+    result to `cache_path`; otherwise an empty `cache_path`.skip marker
+    records that the file is best shipped as is. Runs in worker processes,
+    so it only takes and returns picklable values: the "size" of the file
+    and its "optimized_size".
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    optimized = optimize_png(data)
+    target = cache_path if optimized is not data else cache_path + ".skip"
+    with atomic_write(target, 'wb') as f:
+        f.write(optimized if optimized is not data else b"")
+    return {"size": len(data), "optimized_size": len(optimized)}
+
+def optimize_pngs(static_dir: str, jobs: int = 1, cache_dir: str = PNG_CACHE_DIR) -> dict:
+    """
+    Optimizes every PNG under `static_dir` across a pool of `jobs` worker
+    processes. Results are cached under `cache_dir` by the content hash of
+    the source, so an unchanged image is only hashed on later builds; the
+    sources themselves are never modified.
+
+    Returns {"replacements": {rel_path: optimized_path}} for the images that
+    got smaller (to be shipped instead of the originals), the rel_paths
+    "optimized" by this run, the number of "cached" results reused and the
+    bytes "saved" across all images.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    candidates = []
+    pending = []
+    cached = 0
+    for dirpath, dirnames, filenames in os.walk(static_dir):
+        for filename in filenames:
+            if not filename.lower().endswith(".png"):
+                continue
+            path = os.path.join(dirpath, filename)
+            rel = os.path.relpath(path, static_dir)
+            cache_path = os.path.join(cache_dir, hash_file(path) + ".png")
+            candidates.append((rel, path, cache_path))
+            if os.path.exists(cache_path) or os.path.exists(cache_path + ".skip"):
+                cached += 1
+            else:
+                pending.append((rel, path, cache_path))
+
+    paths = [path for _, path, _ in pending]
+    cache_paths = [cache_path for _, _, cache_path in pending]
+    if jobs == 1 or len(pending) <= 1:
+        for path, cache_path in zip(paths, cache_paths):
+            optimize_file(path, cache_path)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(optimize_file, paths, cache_paths))
+
+    replacements = {}
+    saved = 0
+    for rel, path, cache_path in sorted(candidates):
+        if os.path.exists(cache_path):
+            replacements[rel] = cache_path
+            saved += os.path.getsize(path) - os.path.getsize(cache_path)
+    return {"replacements": replacements, "optimized": sorted(rel for rel, _, _ in pending),
+            "cached": cached, "saved": saved}
@@ -0,0 +1,136 @@
+import gzip
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from build_manifest import hash_bytes, hash_file
+from atomic_file import atomic_write
+
+# Text formats worth compressing; images and archives are already compressed.
+COMPRESSIBLE_EXTENSIONS = frozenset((
+    ".html", ".htm", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".xml", ".map", ".md",
+))
+SIDECAR_SUFFIXES = (".gz", ".zst")
+GZIP_LEVEL = 9
+ZSTD_LEVEL = 22
+# Content hashes of the files compressed by the last run, per output file.
+PRECOMPRESS_STATE = os.path.join('.cache', 'precompress.json')
+
+try:
+    from compression import zstd as _zstd  # Python 3.14+
+
+    def _zstd_compress(data: bytes) -> bytes:
+        return _zstd.compress(data, level=ZSTD_LEVEL)
+except ImportError:
+    try:
+        import zstandard
+
+        def _zstd_compress(data: bytes) -> bytes:
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    except ImportError:  # zstd sidecars are optional; gzip needs only the stdlib
+        _zstd_compress = None
+
+def zstd_available() -> bool:
+    return _zstd_compress is not None
+
+def _write_sidecar(path: str, data: bytes):
+    with atomic_write(path, 'wb') as f:
+        f.write(data)
+
+def compress_file(path: str, use_zstd: bool = True) -> dict:
+    """
+    Writes the .gz (and, if `use_zstd` and available, .zst) sidecar of
+    `path` at maximum compression. A sidecar that would not be smaller than
+    the file is not written, and any old one is removed. Runs in worker
+    processes, so it only takes and returns picklable values: the file's
+    content "hash", the "sidecars" written (of which "added" are new) and
+    the old sidecars "removed".
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    encoders = [(".gz", lambda d: gzip.compress(d, GZIP_LEVEL, mtime=0))]
+    if use_zstd and zstd_available():
+        encoders.append((".zst", _zstd_compress))
+    sidecars, added, removed = [], [], []
+    for suffix, encode in encoders:
+        compressed = encode(data)
+        if len(compressed) < len(data):
+            if not os.path.exists(path + suffix):
+                added.append(path + suffix)
+            _write_sidecar(path + suffix, compressed)
+            sidecars.append(path + suffix)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+            removed.append(path + suffix)
+    return {"hash": hash_bytes(data), "sidecars": sidecars, "added": added, "removed": removed}
+
+def _load_state(path: str) -> dict:
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+def _save_state(path: str, state: dict):
+    with atomic_write(path) as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+
+def _is_compressible(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+def precompress_directory(directory: str, jobs: int = 1, use_zstd: bool = True,
+                          state_path: str = PRECOMPRESS_STATE) -> dict:
+    """
+    Writes compressed sidecars for every compressible file under `directory`,
+    across a pool of `jobs` worker processes. Files whose content hash
+    matches the last run (recorded in `state_path`) and whose sidecars are
+    still present are skipped, and sidecars written by an earlier run whose
+    file is gone are deleted; other .gz/.zst files are left alone.
+
+    Returns {"compressed": [paths], "sidecars": {sidecar: "added" or
+    "modified"}, "unchanged": count, "removed": [sidecar paths]}.
+    """
+    state = _load_state(state_path)
+    suffixes = [".gz", ".zst"] if use_zstd and zstd_available() else [".gz"]
+    pending = []
+    unchanged = 0
+    removed = []
+    seen = set()
+    known_sidecars = {sidecar for entry in state.values() for sidecar in entry.get("sidecars") or ()}
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if path in known_sidecars:
+                if not os.path.isfile(path[:path.rindex(".")]):
+                    os.remove(path)
+                    removed.append(path)
+                continue
+            if not _is_compressible(filename):
+                continue
+            seen.add(path)
+            entry = state.get(path)
+            if entry is not None and entry.get("sidecars") is not None and \
+                    all(os.path.isfile(sidecar) for sidecar in entry["sidecars"]) and \
+                    entry.get("suffixes") == suffixes and hash_file(path) == entry.get("hash"):
+                unchanged += 1
+                continue
+            pending.append(path)
+
+    if jobs == 1 or len(pending) <= 1:
+        results = [compress_file(path, use_zstd) for path in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(compress_file, pending, [use_zstd] * len(pending), chunksize=8))
+    sidecars = {}
+    for path, result in zip(pending, results):
+        state[path] = {"hash": result["hash"], "sidecars": result["sidecars"], "suffixes": suffixes}
+        for sidecar in result["sidecars"]:
+            sidecars[sidecar] = "added" if sidecar in result["added"] else "modified"
+        removed.extend(result["removed"])
+
+    # forget files of this directory that no longer exist
+    prefix = os.path.join(directory, "")
+    for path in [path for path in state if path.startswith(prefix) and path not in seen]:
+        del state[path]
+    _save_state(state_path, state)
+    return {"compressed": pending, "sidecars": sidecars, "unchanged": unchanged, "removed": removed}
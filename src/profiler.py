@@ -0,0 +1,165 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+class Profiler:
+    """
+    Collects timed spans for a build: build-level stages (static copy, page
+    scan, ...) and per-page stages (read, parse, render, write, ...).
+
+    Each span records its wall time from the system-wide monotonic clock, so
+    spans recorded in worker processes line up with the parent's. With
+    `trace_memory`, allocations are traced with tracemalloc (started if it
+    is not running yet, which slows everything down noticeably) and each
+    span also records "peak_bytes", the most memory it had allocated on top
+    of what was live when it started (nested spans included), and
+    "net_bytes", what it left allocated. Spans are plain dicts so they can
+    be returned from worker processes.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.origin_ns = time.monotonic_ns()
+        self.events = []
+        self.trace_memory = trace_memory
+        self._started_tracing = False
+        # [traced size at start, highest traced size so far] per open span;
+        # tracemalloc keeps a single peak, so nested spans hand theirs up
+        self._open = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def close(self):
+        """Stops tracemalloc if this profiler started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def span(self, name: str, page: str = None):
+        with self.memory() as memory:
+            start = time.monotonic_ns()
+            try:
+                yield
+            finally:
+                duration_ns = time.monotonic_ns() - start
+        self.record(name, start, duration_ns, page, memory["peak_bytes"], memory["net_bytes"])
+
+    @contextmanager
+    def memory(self):
+        """
+        Yields a dict that holds the "peak_bytes" and "net_bytes" of the
+        block once it exits (both 0 unless memory is traced), for stages
+        timed by hand and recorded with record().
+        """
+        memory = {"peak_bytes": 0, "net_bytes": 0}
+        if not (self.trace_memory and tracemalloc.is_tracing()):
+            yield memory
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        if self._open:
+            self._open[-1][1] = max(self._open[-1][1], peak)
+        self._open.append([current, current])
+        tracemalloc.reset_peak()
+        try:
+            yield memory
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            start_bytes, highest = self._open.pop()
+            highest = max(highest, peak)
+            if self._open:
+                self._open[-1][1] = max(self._open[-1][1], highest)
+            memory["peak_bytes"], memory["net_bytes"] = highest - start_bytes, current - start_bytes
+
+    def record(self, name: str, start_ns: int, duration_ns: int, page: str = None, peak_bytes: int = 0,
+               net_bytes: int = 0):
+        self.events.append({
+            "name": name,
+            "page": page,
+            "start_ns": start_ns,
+            "duration_ns": duration_ns,
+            "peak_bytes": peak_bytes,
+            "net_bytes": net_bytes,
+            "pid": os.getpid(),
+        })
+
+    def extend(self, events):
+        """Adds spans recorded by another Profiler (e.g. in a worker process)."""
+        self.events.extend(events)
+
+    def page_totals(self) -> dict:
+        """Returns {page: {stage: seconds, ..., "total": seconds}} for every profiled page."""
+        pages = {}
+        for event in self.events:
+            if event["page"] is None:
+                continue
+            stages = pages.setdefault(event["page"], {"total": 0.0})
+            seconds = event["duration_ns"] / 1e9
+            stages[event["name"]] = stages.get(event["name"], 0.0) + seconds
+            stages["total"] += seconds
+        return pages
+
+    def stage_totals(self) -> dict:
+        """Returns the summed seconds and net bytes and the highest peak bytes per stage name."""
+        stages = {}
+        for event in self.events:
+            stage = stages.setdefault(event["name"], {"seconds": 0.0, "peak_bytes": 0, "net_bytes": 0, "count": 0})
+            stage["seconds"] += event["duration_ns"] / 1e9
+            stage["peak_bytes"] = max(stage["peak_bytes"], event["peak_bytes"])
+            stage["net_bytes"] += event["net_bytes"]
+            stage["count"] += 1
+        return stages
+
+    def slowest_pages(self, n: int = 10) -> list:
+        """Returns the `n` pages with the highest total time as (page, stages) pairs."""
+        pages = self.page_totals()
+        return sorted(pages.items(), key=lambda item: item[1]["total"], reverse=True)[:n]
+
+    def write_json(self, path: str):
+        data = {
+            "stages": self.stage_totals(),
+            "pages": self.page_totals(),
+            "events": [
+                dict(event, start_ns=event["start_ns"] - self.origin_ns) for event in self.events
+            ],
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1)
+
+    def write_chrome_trace(self, path: str):
+        """
+        Writes the spans in Chrome trace-event format (complete "X" events),
+        viewable in chrome://tracing or Perfetto, one lane per process.
+        """
+        trace = [
+            {
+                "name": event["name"],
+                "cat": "page" if event["page"] is not None else "build",
+                "ph": "X",
+                "ts": (event["start_ns"] - self.origin_ns) / 1e3,
+                "dur": event["duration_ns"] / 1e3,
+                "pid": event["pid"],
+                "tid": 0,
+                "args": {"page": event["page"], "peak_bytes": event["peak_bytes"], "net_bytes": event["net_bytes"]},
+            }
+            for event in self.events
+        ]
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+    def format_summary(self, n: int = 10) -> str:
+        lines = ["Build profile by stage:"]
+        for name, stage in sorted(self.stage_totals().items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"  {name:<20}{stage['seconds'] * 1e3:>10.1f} ms{stage['count']:>8}x"
+                         f"{stage['peak_bytes'] / 1024:>10.0f} KiB peak{stage['net_bytes'] / 1024:>+10.0f} KiB net")
+        slowest = self.slowest_pages(n)
+        if slowest:
+            lines.append(f"Slowest {len(slowest)} page(s):")
+            for page, stages in slowest:
+                detail = ", ".join(
+                    f"{name} {seconds * 1e3:.1f}" for name, seconds in stages.items() if name != "total"
+                )
+                lines.append(f"  {stages['total'] * 1e3:>8.1f} ms  {page}  ({detail})")
+        return "\n".join(lines)
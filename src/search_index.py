@@ -0,0 +1,127 @@
+import json
+import os
+import re
+from atomic_file import atomic_write
+
+SEARCH_VERSION = 1
+# Written under each output directory: index.json (page table and shard
+# list) and one shard-*.json per term prefix.
+SEARCH_DIR = "search"
+SEARCH_INDEX_NAME = "index.json"
+# Terms are sharded by their first SHARD_PREFIX characters, so a query
+# only downloads the shards of its own terms (and prefix search works).
+SHARD_PREFIX = 2
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 32
+TOKEN = re.compile(r"\w+")
+SAFE_SHARD_NAME = re.compile(r"[a-z0-9_]+\Z")
+# Title, source hash and terms of every indexed page, so incremental builds
+# only re-tokenize the pages they render.
+SEARCH_STATE = os.path.join('.cache', 'search.json')
+
+def tokenize(texts) -> list[str]:
+    """Splits the strings in `texts` into lowercase word tokens, in order."""
+    tokens = []
+    for text in texts:
+        tokens.extend(TOKEN.findall(text.lower()))
+    return tokens
+
+def page_terms(texts) -> dict:
+    """
+    Returns {term: [positions]} for the text of one page, where positions
+    are token offsets so phrases can be matched. Tokens shorter than
+    MIN_TERM_LENGTH or longer than MAX_TERM_LENGTH still take up a position
+    but are not indexed.
+    """
+    terms = {}
+    for position, token in enumerate(tokenize(texts)):
+        if MIN_TERM_LENGTH <= len(token) <= MAX_TERM_LENGTH:
+            terms.setdefault(token, []).append(position)
+    return terms
+
+def shard_name(prefix: str) -> str:
+    """Returns the file name of a shard; prefixes that are not plain ASCII are hex-encoded."""
+    if SAFE_SHARD_NAME.match(prefix):
+        return f"shard-{prefix}.json"
+    return f"shard-x{prefix.encode('utf-8').hex()}.json"
+
+def build_index(pages, basepath: str = "/"):
+    """
+    Builds the inverted index of `pages`, a list of (path, title, terms)
+    tuples where terms come from page_terms. Page ids are positions in the
+    page table, which is sorted by path so ids are stable between builds.
+
+    Returns (index, shards): index is {"version", "basepath",
+    "shard_prefix", "pages": [[path, title]], "shards": {prefix: file}},
+    and shards maps each file name to {term: [[page_id, [positions]]]}.
+    """
+    pages = sorted(pages, key=lambda page: page[0])
+    shards = {}
+    for page_id, (_, _, terms) in enumerate(pages):
+        for term, positions in terms.items():
+            shard = shards.setdefault(term[:SHARD_PREFIX], {})
+            shard.setdefault(term, []).append([page_id, positions])
+    index = {
+        "version": SEARCH_VERSION,
+        "basepath": basepath,
+        "shard_prefix": SHARD_PREFIX,
+        "pages": [[path, title] for path, title, _ in pages],
+        "shards": {prefix: shard_name(prefix) for prefix in sorted(shards)},
+    }
+    return index, {shard_name(prefix): dict(sorted(shard.items())) for prefix, shard in shards.items()}
+
+def _write_if_changed(path: str, data: bytes):
+    """Atomically writes `data` to `path` unless it already holds it; returns "added", "modified" or None."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return None
+        status = "modified"
+    except OSError:
+        status = "added"
+    with atomic_write(path, 'wb') as f:
+        f.write(data)
+    return status
+
+def write_search_index(output_dir: str, pages, basepath: str = "/") -> dict:
+    """
+    Writes the index of `pages` (see build_index) as compact JSON under
+    `output_dir`/SEARCH_DIR. Files that already hold the same bytes are
+    left alone and shards no longer needed are deleted.
+
+    Returns {"files": {path: "added" or "modified"}, "deleted": [paths],
+    "pages": count, "terms": count}.
+    """
+    index, shards = build_index(pages, basepath)
+    search_dir = os.path.join(output_dir, SEARCH_DIR)
+    os.makedirs(search_dir, exist_ok=True)
+    files = dict(shards, **{SEARCH_INDEX_NAME: index})
+    written = {}
+    for name, data in files.items():
+        path = os.path.join(search_dir, name)
+        status = _write_if_changed(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        if status is not None:
+            written[path] = status
+    deleted = []
+    for name in sorted(os.listdir(search_dir)):
+        if name.startswith("shard-") and name.endswith(".json") and name not in files:
+            os.remove(os.path.join(search_dir, name))
+            deleted.append(os.path.join(search_dir, name))
+    return {"files": written, "deleted": deleted, "pages": len(index["pages"]),
+            "terms": sum(len(shard) for shard in shards.values())}
+
+def load_search_state(path: str = SEARCH_STATE) -> dict:
+    """Returns {from_path: {"hash", "title", "terms"}} from the last build, or {} if missing or unreadable."""
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(state, dict) or state.get("version") != SEARCH_VERSION:
+        return {}
+    pages = state.get("pages")
+    return pages if isinstance(pages, dict) else {}
+
+def save_search_state(pages: dict, path: str = SEARCH_STATE):
+    with atomic_write(path) as f:
+        json.dump({"version": SEARCH_VERSION, "pages": pages}, f, separators=(",", ":"))
@@ -1,6 +1,12 @@
+import re
 from textnode import TextNode, TextType
 from markdown_extractor import extract_markdown_images, extract_markdown_links
 
+# Characters that can start an inline token; everything else is plain text.
+INLINE_SPECIAL = re.compile(r"[*_`!\[]")
+IMAGE_AT = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_AT = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     """Simplified splitter: operates on a flat list and returns a flat list.
 
@@ -131,27 +137,79 @@ def split_nodes_link(old_nodes):
     flush_buffer()
     return new_nodes
 
+def tokenize_inline(text: str) -> list[TextNode]:
+    """Single left-to-right scan producing the inline TextNode stream.
+
+    - `code` spans are taken verbatim, so delimiters inside them are literal.
+    - **bold**, *italic* and _italic_ run to the next matching delimiter;
+      their content is kept as-is (TextNodes do not nest).
+    - ![alt](url) and [label](url) are recognised where they start, so
+      emphasis characters inside URLs or labels are not split.
+    - Empty formatted sections are dropped; an unclosed delimiter raises
+      ValueError, like split_nodes_delimiter.
+    """
+    nodes = []
+    plain_start = 0
+    pos = 0
+    end = len(text)
+
+    def flush(stop):
+        if stop > plain_start:
+            nodes.append(TextNode(text[plain_start:stop], TextType.PLAIN))
+
+    while pos < end:
+        m = INLINE_SPECIAL.search(text, pos)
+        if m is None:
+            break
+        i = m.start()
+        ch = text[i]
+
+        if ch == "!" or ch == "[":
+            if ch == "!":
+                match = IMAGE_AT.match(text, i)
+                text_type = TextType.IMAGES
+            elif i == 0 or text[i - 1] != "!":
+                match = LINK_AT.match(text, i)
+                text_type = TextType.LINKS
+            else:
+                match = None
+            if match is None:
+                pos = i + 1
+                continue
+            flush(i)
+            nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            pos = plain_start = match.end()
+            continue
+
+        if ch == "`":
+            delimiter, text_type = "`", TextType.CODE_TEXT
+        elif ch == "*" and text.startswith("**", i):
+            delimiter, text_type = "**", TextType.BOLD
+        else:
+            delimiter, text_type = ch, TextType.ITALIC
+
+        content_start = i + len(delimiter)
+        close = text.find(delimiter, content_start)
+        if close == -1:
+            raise ValueError("invalid markdown, formatted section not closed")
+        flush(i)
+        if close > content_start:
+            nodes.append(TextNode(text[content_start:close], text_type))
+        pos = plain_start = close + len(delimiter)
+
+    flush(end)
+    return nodes
+
 def text_to_text_node(text: str) -> list[TextNode]:
     """
     Converts a plain text string into a list of TextNode instances.
 
     - Empty string yields an empty list.
     - Otherwise returns a sequence of TextNodes representing plain and formatted parts.
+
+    Parsing is done in one pass by tokenize_inline; the split_nodes_* helpers
+    remain available for working on existing node lists.
     """
     if text == "":
         return []
-
-    # Start with a single plain text node
-    nodes = [TextNode(text, TextType.PLAIN)]
-
-    # Apply formatting splitters in order
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE_TEXT)
-
-    # Apply image and link splitters
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-
-    return nodes
+    return tokenize_inline(text)
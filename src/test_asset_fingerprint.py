@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import unittest
+
+from asset_fingerprint import (
+    ASSET_MANIFEST_NAME,
+    AssetRewriter,
+    build_asset_map,
+    fingerprint_name,
+    write_fingerprinted,
+)
+from generation_tools import generate_page
+from htmlnode import LeafNode, ParentNode
+from page_template import CompiledTemplate
+
+
+class TestAssetMap(unittest.TestCase):
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name("images/tom.png", "0123456789abcdef"), "images/tom.0123456789.png")
+
+    def test_write_fingerprinted_copies_and_manifest(self):
+        with tempfile.TemporaryDirectory() as d:
+            static = os.path.join(d, "static")
+            os.makedirs(os.path.join(static, "images"))
+            with open(os.path.join(static, "index.css"), "w") as f:
+                f.write("body {}")
+            with open(os.path.join(static, "images", "a.png"), "wb") as f:
+                f.write(b"png")
+            assets = build_asset_map(static)
+            self.assertEqual(list(assets), ["images/a.png", "index.css"])
+
+            out = os.path.join(d, "out")
+            written = write_fingerprinted(static, out, assets)
+            self.assertEqual(sorted(written), sorted(assets.values()))
+            with open(os.path.join(out, assets["index.css"])) as f:
+                self.assertEqual(f.read(), "body {}")
+            with open(os.path.join(out, ASSET_MANIFEST_NAME)) as f:
+                self.assertEqual(json.load(f), assets)
+            self.assertEqual(write_fingerprinted(static, out, assets), [])
+
+    def test_replacements_are_hashed(self):
+        with tempfile.TemporaryDirectory() as d:
+            static = os.path.join(d, "static")
+            os.makedirs(os.path.join(static, "images"))
+            with open(os.path.join(static, "images", "a.png"), "wb") as f:
+                f.write(b"png")
+            optimized = os.path.join(d, "a.png")
+            with open(optimized, "wb") as f:
+                f.write(b"pn")
+            assets = build_asset_map(static, {os.path.join("images", "a.png"): optimized})
+            self.assertNotEqual(assets, build_asset_map(static))
+
+            out = os.path.join(d, "out")
+            write_fingerprinted(static, out, assets, replacements={os.path.join("images", "a.png"): optimized})
+            with open(os.path.join(out, assets["images/a.png"]), "rb") as f:
+                self.assertEqual(f.read(), b"pn")
+
+
+class TestAssetRewriter(unittest.TestCase):
+    def setUp(self):
+        self.rewriter = AssetRewriter("/base/", {"index.css": "index.abc.css", "img/a.png": "img/a.def.png"})
+
+    def test_nodes(self):
+        node = ParentNode("p", [
+            LeafNode("img", "", {"src": "/img/a.png", "alt": "a"}),
+            LeafNode("a", "css", {"href": "/index.css?v=1#top"}),
+            LeafNode("a", "page", {"href": "/blog/"}),
+        ])
+        self.assertEqual(
+            node.to_html(self.rewriter),
+            '<p><img src="/base/img/a.def.png" alt="a"></img><a href="/base/index.abc.css?v=1#top">css</a>'
+            '<a href="/base/blog/">page</a></p>',
+        )
+
+    def test_template_variant_is_shared(self):
+        template = CompiledTemplate('<link href="/index.css" />{{ Content }}')
+        variant = template.for_basepath(self.rewriter)
+        self.assertEqual(variant.render(Content="x"), '<link href="/base/index.abc.css" />x')
+        other = AssetRewriter("/base/", dict(self.rewriter.assets))
+        self.assertIs(template.for_basepath(other), variant)
+
+    def test_generate_page_with_assets(self):
+        with tempfile.TemporaryDirectory() as d:
+            md = os.path.join(d, "index.md")
+            tpl = os.path.join(d, "template.html")
+            with open(md, "w") as f:
+                f.write("# T\n\n![a](/img/a.png)")
+            with open(tpl, "w") as f:
+                f.write('<link href="/index.css" />{{ Content }}')
+            page = generate_page(md, tpl, os.path.join(d, "out.html"), basepath="/base",
+                                 assets=self.rewriter.assets)
+            self.assertIn('href="/base/index.abc.css"', page)
+            self.assertIn('src="/base/img/a.def.png"', page)
+
+
+if __name__ == "__main__":
+    unittest.main()
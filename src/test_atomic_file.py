@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+from atomic_file import atomic_write
+
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sub", "out.txt")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_replaces_file_and_creates_directories(self):
+        with atomic_write(self.path) as f:
+            f.write("one")
+        with atomic_write(self.path) as f:
+            f.write("two")
+            self.assertEqual(self.read(), "one")
+        self.assertEqual(self.read(), "two")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["out.txt"])
+
+    def test_failure_leaves_file_alone(self):
+        with atomic_write(self.path) as f:
+            f.write("one")
+        with self.assertRaises(ValueError):
+            with atomic_write(self.path) as f:
+                f.write("half")
+                raise ValueError
+        self.assertEqual(self.read(), "one")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["out.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
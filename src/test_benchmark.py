@@ -0,0 +1,28 @@
+import unittest
+
+from benchmark import STAGES, generate_corpus, run_benchmark
+from markdown_blocks import markdown_to_html_node
+from generation_tools import extract_title
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_corpus_is_deterministic(self):
+        self.assertEqual(generate_corpus(pages=5, seed=3), generate_corpus(pages=5, seed=3))
+        self.assertNotEqual(generate_corpus(pages=5, seed=3), generate_corpus(pages=5, seed=4))
+
+    def test_corpus_pages_render(self):
+        for path, markdown in generate_corpus(pages=10, seed=1, list_ratio=0.3, code_ratio=0.2):
+            self.assertTrue(path.endswith(".md"))
+            extract_title(markdown)
+            self.assertTrue(markdown_to_html_node(markdown).to_html().startswith("<div>"))
+
+    def test_run_benchmark_reports_every_stage(self):
+        result = run_benchmark(generate_corpus(pages=3), repeat=2)
+        self.assertEqual(result["pages"], 3)
+        self.assertEqual(list(result["stages"]), list(STAGES))
+        for stats in result["stages"].values():
+            self.assertLessEqual(stats["min"], stats["max"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from build_manifest import BuildManifest, hash_bytes, hash_file
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        self.dest = os.path.join(self.dir, "out.html")
+        with open(self.dest, "w") as f:
+            f.write("<p>hi</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_file_matches_hash_bytes(self):
+        self.assertEqual(hash_file(self.dest), hash_bytes(b"<p>hi</p>"))
+
+    def test_missing_manifest_is_empty(self):
+        manifest = BuildManifest.load(self.manifest_path)
+        self.assertEqual(manifest.entries, {})
+
+    def test_corrupt_manifest_is_empty(self):
+        with open(self.manifest_path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(BuildManifest.load(self.manifest_path).entries, {})
+
+    def test_round_trip_and_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("a.md", self.dest, "src", "tpl", "/", hash_file(self.dest))
+        manifest.save()
+
+        loaded = BuildManifest.load(self.manifest_path)
+        self.assertTrue(loaded.is_fresh("a.md", self.dest, "src", "tpl", "/"))
+
+    def test_changed_inputs_are_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("a.md", self.dest, "src", "tpl", "/", hash_file(self.dest))
+        self.assertFalse(manifest.is_fresh("a.md", self.dest, "other", "tpl", "/"))
+        self.assertFalse(manifest.is_fresh("a.md", self.dest, "src", "other", "/"))
+        self.assertFalse(manifest.is_fresh("a.md", self.dest, "src", "tpl", "/base/"))
+        self.assertFalse(manifest.is_fresh("b.md", self.dest, "src", "tpl", "/"))
+
+    def test_modified_output_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("a.md", self.dest, "src", "tpl", "/", hash_file(self.dest))
+        with open(self.dest, "w") as f:
+            f.write("edited")
+        self.assertFalse(manifest.is_fresh("a.md", self.dest, "src", "tpl", "/"))
+
+    def test_prune_returns_outputs_of_removed_sources(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("a.md", "a.html", "1", "t", "/", "x")
+        manifest.record("b.md", "b.html", "2", "t", "/", "y")
+        self.assertEqual(manifest.prune(["a.md"]), ["b.html"])
+        self.assertEqual(list(manifest.entries), ["a.md"])
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs("content/blog")
+        os.makedirs("static")
+        with open("static/index.css", "w") as f:
+            f.write("body {}")
+        with open("template.html", "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        with open("content/index.md", "w") as f:
+            f.write("# Home\n\nhello")
+        with open("content/blog/post.md", "w") as f:
+            f.write("# Post\n\nbody")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_second_build_skips_and_removes(self):
+        from main import main
+
+        main([])
+        self.assertTrue(os.path.isfile("docs/blog/post.html"))
+        mtime = os.stat("docs/index.html").st_mtime_ns
+
+        os.remove("content/blog/post.md")
+        main([])
+        self.assertFalse(os.path.exists("docs/blog/post.html"))
+        self.assertEqual(os.stat("docs/index.html").st_mtime_ns, mtime)
+        self.assertTrue(os.path.isfile("docs/index.css"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from copy_directory import copy_directory, sync_directory
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "docs")
+        write(os.path.join(self.src, "index.css"), "body {}")
+        write(os.path.join(self.src, "images", "a.png"), "png-a")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_first_sync_copies_everything(self):
+        result = sync_directory(self.src, self.dst)
+        self.assertEqual(result["copied"], ["images/a.png", "index.css"])
+        self.assertEqual(read(os.path.join(self.dst, "images", "a.png")), "png-a")
+
+    def test_second_sync_copies_nothing(self):
+        sync_directory(self.src, self.dst)
+        result = sync_directory(self.src, self.dst)
+        self.assertEqual(result, {"copied": [], "added": [], "deleted": [], "unchanged": 2})
+
+    def test_changed_file_is_replaced(self):
+        copy_directory(self.src, self.dst)
+        write(os.path.join(self.src, "index.css"), "body { color: red }")
+        result = sync_directory(self.src, self.dst)
+        self.assertEqual(result["copied"], ["index.css"])
+        self.assertEqual(result["added"], [])
+        self.assertEqual(read(os.path.join(self.dst, "index.css")), "body { color: red }")
+
+    def test_checksum_detects_same_size_edit(self):
+        sync_directory(self.src, self.dst)
+        dst_css = os.path.join(self.dst, "index.css")
+        st = os.stat(dst_css)
+        write(dst_css, "BODY {}")
+        os.utime(dst_css, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertEqual(sync_directory(self.src, self.dst)["copied"], [])
+        self.assertEqual(sync_directory(self.src, self.dst, checksum=True)["copied"], ["index.css"])
+
+    def test_removed_files_are_deleted_but_kept_paths_survive(self):
+        sync_directory(self.src, self.dst)
+        write(os.path.join(self.dst, "blog", "post.html"), "<p>page</p>")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        os.rmdir(os.path.join(self.src, "images"))
+
+        result = sync_directory(self.src, self.dst, keep=["blog/post.html"])
+        self.assertEqual(result["deleted"], ["images/a.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+        self.assertTrue(os.path.isfile(os.path.join(self.dst, "blog", "post.html")))
+
+    def test_sidecars_of_kept_and_source_files_survive(self):
+        sync_directory(self.src, self.dst)
+        for rel in ("index.css.gz", "blog/post.html", "blog/post.html.gz", "gone.html.gz"):
+            write(os.path.join(self.dst, rel), "x")
+
+        result = sync_directory(self.src, self.dst, keep=["blog/post.html"], keep_suffixes=(".gz",))
+        self.assertEqual(result["deleted"], ["gone.html.gz"])
+        self.assertTrue(os.path.isfile(os.path.join(self.dst, "index.css.gz")))
+        self.assertTrue(os.path.isfile(os.path.join(self.dst, "blog", "post.html.gz")))
+
+    def test_link_mode_hardlinks(self):
+        sync_directory(self.src, self.dst, link=True)
+        self.assertTrue(os.path.samefile(
+            os.path.join(self.src, "index.css"), os.path.join(self.dst, "index.css")
+        ))
+        self.assertEqual(sync_directory(self.src, self.dst, link=True)["copied"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from build_manifest import hash_bytes
+from deploy_manifest import ADDED, DELETED, MODIFIED, DeployManifest
+
+
+class TestDeployManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.out, "blog"))
+        self.page = os.path.join(self.out, "blog", "post.html")
+        with open(self.page, "wb") as f:
+            f.write(b"<p>hi</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_entries_are_relative_with_size_and_hash(self):
+        deploy = DeployManifest(self.out, "/base/")
+        deploy.record(self.page, ADDED)
+        deploy.record(os.path.join(self.out, "old.css"), DELETED)
+        data = deploy.save(os.path.join(self.tmp.name, "deploy.json"))
+        self.assertEqual(data["basepath"], "/base/")
+        self.assertEqual(data["files"], [
+            {"path": "blog/post.html", "size": 9, "hash": hash_bytes(b"<p>hi</p>"), "status": "added"},
+        ])
+        self.assertEqual(data["deleted"], ["old.css"])
+
+    def test_changes_to_one_path_collapse(self):
+        deploy = DeployManifest(self.out)
+        gone = os.path.join(self.out, "gone.html")
+        deploy.record(gone, ADDED)
+        deploy.record(gone, DELETED)
+        deploy.record(self.page, DELETED)
+        deploy.record(self.page, ADDED)
+        self.assertEqual(deploy.changes, {self.page: MODIFIED})
+        self.assertEqual(deploy.changed_paths(), [self.page])
+
+
+if __name__ == "__main__":
+    unittest.main()
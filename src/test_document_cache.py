@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from document_cache import DocumentCache
+from generation_tools import generate_page, generate_page_targets
+
+
+class TestDocumentCache(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as d:
+            key = DocumentCache.key("# Title\n\ntext")
+            DocumentCache(d).put(key, "Title", ['<div><a href="', 'x">a\nb</a></div>'])
+            cache = DocumentCache(d)
+            self.assertEqual(cache.get(key), ("Title", ('<div><a href="', 'x">a\nb</a></div>')))
+            self.assertEqual(cache.stats(), {"doc_hits": 1, "doc_misses": 0})
+
+    def test_miss_and_corrupt_entry(self):
+        with tempfile.TemporaryDirectory() as d:
+            cache = DocumentCache(d)
+            key = DocumentCache.key("text")
+            self.assertIsNone(cache.get(key))
+            os.makedirs(os.path.dirname(cache._path(key)))
+            with open(cache._path(key), 'wb') as f:
+                f.write(b"not zlib")
+            self.assertIsNone(cache.get(key))
+            self.assertEqual(cache.stats(), {"doc_hits": 0, "doc_misses": 2})
+
+    def test_key_depends_on_source(self):
+        self.assertNotEqual(DocumentCache.key("# A"), DocumentCache.key("# B"))
+
+
+class TestCachedGeneratePage(unittest.TestCase):
+    def test_template_change_reuses_parsed_page(self):
+        with tempfile.TemporaryDirectory() as d:
+            md = os.path.join(d, "index.md")
+            tpl = os.path.join(d, "template.html")
+            with open(md, 'w') as f:
+                f.write("# Title\n\n[Home](/) and ![img](/a.png)")
+            with open(tpl, 'w') as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            cache = DocumentCache(os.path.join(d, "documents"))
+            generate_page(md, tpl, os.path.join(d, "a.html"), doc_cache=cache)
+
+            with open(tpl, 'w') as f:
+                f.write("<h1>{{ Title }}</h1><main>{{ Content }}</main>")
+            expected = generate_page(md, tpl, os.path.join(d, "b.html"), basepath='/base')
+            cached = generate_page(md, tpl, os.path.join(d, "c.html"), basepath='/base', doc_cache=cache)
+
+            self.assertEqual(cached, expected)
+            self.assertIn('href="/base/"', cached)
+            self.assertEqual(cache.stats(), {"doc_hits": 1, "doc_misses": 1})
+
+    def test_search_text_lookups_are_not_counted(self):
+        with tempfile.TemporaryDirectory() as d:
+            md = os.path.join(d, "index.md")
+            tpl = os.path.join(d, "template.html")
+            with open(md, 'w') as f:
+                f.write("# Title\n\nSome text")
+            with open(tpl, 'w') as f:
+                f.write("{{ Content }}")
+            cache = DocumentCache(os.path.join(d, "documents"))
+            searches = [{}, {}]
+            for search in searches:
+                generate_page_targets(md, tpl, [("/", os.path.join(d, "out.html"))], doc_cache=cache, search=search)
+            self.assertEqual(searches[1], searches[0])
+            self.assertEqual(cache.stats(), {"doc_hits": 1, "doc_misses": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
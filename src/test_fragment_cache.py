@@ -0,0 +1,73 @@
+import tempfile
+import unittest
+
+from fragment_cache import FragmentCache, format_cache_stats
+from markdown_blocks import BlockType, markdown_to_html_node
+
+
+class TestFragmentCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = FragmentCache()
+        key = FragmentCache.key("text", BlockType.PARAGRAPH)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, ["<p>text</p>"])
+        self.assertEqual(cache.get(key), ("<p>text</p>",))
+        self.assertEqual(cache.stats(), {"hits": 1, "disk_hits": 0, "misses": 1, "evictions": 0})
+
+    def test_key_depends_on_type(self):
+        self.assertNotEqual(
+            FragmentCache.key("# x", BlockType.HEADING),
+            FragmentCache.key("# x", BlockType.PARAGRAPH),
+        )
+
+    def test_lru_eviction_respects_cap(self):
+        cache = FragmentCache(max_bytes=10)
+        cache.put("a", ["aa", "aa"])
+        cache.put("b", ["bbbb"])
+        cache.get("a")  # a is now the most recently used
+        cache.put("c", ["cccc"])
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.size, 10)
+
+    def test_disk_store_is_shared(self):
+        with tempfile.TemporaryDirectory() as d:
+            FragmentCache(directory=d).put("ab12", ['<a href="', 'x">shared</a>'])
+            other = FragmentCache(directory=d)
+            self.assertEqual(other.get("ab12"), ('<a href="', 'x">shared</a>'))
+            self.assertEqual(other.disk_hits, 1)
+
+    def test_format_stats(self):
+        text = format_cache_stats({"hits": 3, "disk_hits": 1, "misses": 1, "evictions": 0})
+        self.assertIn("75.0% hit rate", text)
+
+
+class TestCachedMarkdown(unittest.TestCase):
+    def test_cached_render_matches_uncached(self):
+        md = "# Title\n> quote after heading\n\nShared **disclaimer** text\n\n- a\n- b\n\n```\ncode\n```"
+        cache = FragmentCache()
+        expected = markdown_to_html_node(md).to_html()
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), expected)
+        self.assertEqual(cache.misses, 4)
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), expected)
+        self.assertEqual(cache.hits, 4)
+
+    def test_cached_block_keeps_basepath_open(self):
+        md = "# T\n\n[Home](/) and ![a](/a.png)"
+        cache = FragmentCache()
+        markdown_to_html_node(md, cache)
+        self.assertEqual(
+            markdown_to_html_node(md, cache).to_html("/base/"),
+            markdown_to_html_node(md).to_html("/base/"),
+        )
+
+    def test_shared_block_across_pages(self):
+        cache = FragmentCache()
+        markdown_to_html_node("# One\n\nShared disclaimer", cache)
+        html = markdown_to_html_node("# Two\n\nShared disclaimer", cache).to_html()
+        self.assertEqual(html, "<div><h1>Two</h1><p>Shared disclaimer</p></div>")
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 from generation_tools import generate_page
+import hashlib
 import os
 
 
@@ -25,3 +26,81 @@ def test_generate_page_applies_basepath(tmp_path, monkeypatch):
     file_content = dest.read_text()
     assert 'href="/base/' in file_content
     assert 'src="/base/' in file_content
+
+
+def test_generate_page_streams_large_sources(tmp_path, monkeypatch):
+    import generation_tools
+
+    md = tmp_path / "big.md"
+    md.write_text('Intro\n\n# Big Title\n\n' + '\n\n'.join(f'Para **{i}** [link](/p{i})' for i in range(200)))
+    tpl = tmp_path / "template.html"
+    tpl.write_text('<title>{{ Title }}</title>{{ Content }}')
+
+    expected = generate_page(str(md), str(tpl), str(tmp_path / "a.html"), basepath='/base')
+    monkeypatch.setattr(generation_tools, "STREAM_THRESHOLD", 0)
+    streamed = generate_page(str(md), str(tpl), str(tmp_path / "b.html"), basepath='/base')
+
+    assert streamed == expected
+    assert '<title>Big Title</title>' in streamed
+
+
+def test_streamed_source_renders_every_target(tmp_path, monkeypatch):
+    import generation_tools
+
+    md = tmp_path / "big.md"
+    md.write_text('# Big Title\n\n' + '\n\n'.join(f'Para {i} [link](/p{i})' for i in range(50)))
+    tpl = tmp_path / "template.html"
+    tpl.write_text('<title>{{ Title }}</title>{{ Content }}')
+    targets = [('/', str(tmp_path / "root.html")), ('/base/', str(tmp_path / "base.html"))]
+
+    expected_search = {}
+    expected = generation_tools.generate_page_targets(str(md), str(tpl), targets, True, search=expected_search)
+    monkeypatch.setattr(generation_tools, "STREAM_THRESHOLD", 0)
+    search = {}
+    streamed = generation_tools.generate_page_targets(str(md), str(tpl), targets, True, search=search)
+
+    assert streamed == expected
+    assert '<a href="/base/p3">link</a>' in streamed[1]
+    assert search == expected_search
+
+
+def test_generate_page_leaves_code_text_alone(tmp_path):
+    md = tmp_path / "index.md"
+    md.write_text('# Title\n\n```\n<a href="/raw">\n```\n\n[Home](/)')
+    tpl = tmp_path / "template.html"
+    tpl.write_text('<script src="/app.js"></script><a href="//cdn.example.com/">{{ Content }}</a>')
+
+    generated = generate_page(str(md), str(tpl), str(tmp_path / "out.html"), basepath='base')
+
+    assert '<script src="/base/app.js">' in generated
+    assert 'href="//cdn.example.com/"' in generated
+    assert '<a href="/base/">Home</a>' in generated
+    assert '<a href="/raw">' in generated
+
+
+def test_write_page_only_writes_what_changed(tmp_path, monkeypatch):
+    import generation_tools
+
+    opened = []
+    real_atomic_write = generation_tools.atomic_write
+
+    def atomic_write(path, *args):
+        opened.append(path)
+        return real_atomic_write(path, *args)
+
+    monkeypatch.setattr(generation_tools, "atomic_write", atomic_write)
+    dest = str(tmp_path / "page.html")
+    assert generation_tools.write_page(dest, b"<p>one</p>")[1] == "added"
+    mtime = os.stat(dest).st_mtime_ns
+    opened.clear()
+
+    assert generation_tools.write_page(dest, "<p>one</p>")[1] == "unchanged"
+    assert opened == []
+    assert os.stat(dest).st_mtime_ns == mtime
+
+    for page in (b"<p>one</p><p>two</p>", b"<p>one", b"<p>uno</p>", b""):
+        output_hash, status = generation_tools.write_page(dest, page)
+        assert status == "modified"
+        assert (tmp_path / "page.html").read_bytes() == page
+        assert output_hash == hashlib.sha256(page).hexdigest()
+    assert sorted(os.listdir(tmp_path)) == ["page.html"]
@@ -1,6 +1,9 @@
+import io
+import pickle
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, RawHTMLNode, html_parts
+from textnode import TextNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -126,7 +129,90 @@ class TestParentNode(unittest.TestCase):
         node = HTMLNode(tag="div", children=[], props={"class": "container"})
         node2 = HTMLNode(tag="div", children=[], props={"id": "main"})
         self.assertNotEqual(node, node2)
-    
+
+
+class TestCompactNodes(unittest.TestCase):
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("div", [LeafNode(None, "x")]), TextNode("x")):
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_open_tag_is_cached_and_reset_on_reassign(self):
+        leaf = LeafNode("a", "link", {"href": "/a"})
+        self.assertIs(leaf.open_tag_parts(), leaf.open_tag_parts())
+        self.assertEqual(leaf.to_html(), '<a href="/a">link</a>')
+        leaf.props = {"href": "/b"}
+        self.assertEqual(leaf.to_html(), '<a href="/b">link</a>')
+        leaf.tag = "span"
+        self.assertEqual(leaf.to_html(), '<span href="/b">link</span>')
+
+    def test_pickle_round_trip(self):
+        node = ParentNode("div", [LeafNode("a", "x", {"href": "/"})], {"id": "main"})
+        node.to_html()
+        copy = pickle.loads(pickle.dumps(node))
+        self.assertEqual(copy, node)
+        self.assertEqual(copy.to_html(), node.to_html())
+
+
+class TestBasepath(unittest.TestCase):
+    def test_basepath_applies_to_root_relative_urls_only(self):
+        node = ParentNode("div", [
+            LeafNode("a", "home", {"href": "/"}),
+            LeafNode("img", "", {"src": "/img/a.png", "alt": "/not-a-url"}),
+            LeafNode("a", "cdn", {"href": "//cdn.example.com/x"}),
+            LeafNode("a", "ext", {"href": "https://example.com/"}),
+            ParentNode("pre", [LeafNode("code", '<a href="/kept">')]),
+        ], {"src": "/top"})
+        self.assertEqual(
+            node.to_html("/base/"),
+            '<div src="/base/top"><a href="/base/">home</a>'
+            '<img src="/base/img/a.png" alt="/not-a-url"></img>'
+            '<a href="//cdn.example.com/x">cdn</a><a href="https://example.com/">ext</a>'
+            '<pre><code><a href="/kept"></code></pre></div>',
+        )
+        self.assertEqual("".join(node.iter_html("/base/")), node.to_html("/base/"))
+
+    def test_html_parts_round_trip(self):
+        nodes = [
+            ParentNode("p", [LeafNode(None, "see "), LeafNode("a", "docs", {"href": "/docs/"})]),
+            LeafNode("img", "", {"src": "/a.png", "alt": "a"}),
+        ]
+        parts = html_parts(nodes)
+        self.assertEqual(len(parts), 3)
+        for basepath in ("/", "/base/"):
+            expected = "".join(node.to_html(basepath) for node in nodes)
+            self.assertEqual(basepath.join(parts), expected)
+            self.assertEqual(RawHTMLNode(parts).to_html(basepath), expected)
+        wrapped = ParentNode("div", [RawHTMLNode(parts)])
+        self.assertEqual(html_parts([wrapped]), ["<div>" + parts[0]] + parts[1:-1] + [parts[-1] + "</div>"])
+
+
+class TestStreamingHTML(unittest.TestCase):
+    def test_write_html_matches_to_html(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")], {"class": "x"}),
+            LeafNode("a", "link", {"href": "/home"}),
+        ])
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+        self.assertEqual(
+            out.getvalue(),
+            '<div><p class="x"><b>Bold</b> text</p><a href="/home">link</a></div>',
+        )
+
+    def test_deep_nesting_does_not_recurse(self):
+        node = LeafNode(None, "x")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "x"))
+        self.assertTrue(html.endswith("</span>" * 5000))
+
+    def test_nested_invalid_child_raises(self):
+        node = ParentNode("div", [ParentNode("p", [])])
+        with self.assertRaises(ValueError):
+            node.write_html(io.StringIO())
+
 if __name__ == "__main__":
     unittest.main()
     
\ No newline at end of file
@@ -0,0 +1,108 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+from document_cache import DocumentCache
+from image_size import ImageSizer, image_size, images_digest, read_image_size
+from markdown_blocks import markdown_to_html_node, render_variant
+
+
+def png_bytes(width, height):
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+    )
+
+
+def jpeg_bytes(width, height):
+    app0 = b"JFIF\x00" + b"\x00" * 9
+    sof = struct.pack(">BHHB", 8, height, width, 3) + b"\x00" * 9
+    return (
+        b"\xff\xd8"
+        + b"\xff\xe0" + struct.pack(">H", len(app0) + 2) + app0
+        + b"\xff\xc0" + struct.pack(">H", len(sof) + 2) + sof
+        + b"\xff\xd9"
+    )
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class TestReadImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        write(path, data)
+        return path
+
+    def test_formats(self):
+        self.assertEqual(read_image_size(self.path("a.png", png_bytes(640, 480))), (640, 480))
+        self.assertEqual(read_image_size(self.path("a.gif", b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 14)), (32, 16))
+        self.assertEqual(read_image_size(self.path("a.jpg", jpeg_bytes(1024, 768))), (1024, 768))
+
+    def test_unknown_or_missing(self):
+        self.assertIsNone(read_image_size(self.path("a.txt", b"not an image at all, really")))
+        self.assertIsNone(read_image_size(self.path("cut.jpg", jpeg_bytes(10, 10)[:12])))
+        self.assertIsNone(read_image_size(os.path.join(self.tmp.name, "missing.png")))
+
+    def test_cache_follows_file_changes(self):
+        path = self.path("a.png", png_bytes(10, 10))
+        self.assertEqual(image_size(path), (10, 10))
+        write(path, png_bytes(20, 10) + b"\x00")
+        self.assertEqual(image_size(path), (20, 10))
+
+
+class TestImageSizer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        write(os.path.join(self.static, "images", "a.png"), png_bytes(300, 200))
+        self.sizer = ImageSizer(self.static)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_props(self):
+        self.assertEqual(
+            self.sizer.props("/images/a.png?v=1"),
+            {"width": "300", "height": "200", "loading": "lazy", "decoding": "async"},
+        )
+        self.assertEqual(self.sizer.props("https://example.com/a.png"), {"loading": "lazy", "decoding": "async"})
+        self.assertIsNone(self.sizer.path_for("/../secret.png"))
+
+    def test_markdown_images_get_attributes(self):
+        html = markdown_to_html_node("![alt](/images/a.png) and ![x](/missing.png)", images=self.sizer).to_html()
+        self.assertEqual(
+            html,
+            '<div><p><img src="/images/a.png" alt="alt" width="300" height="200" loading="lazy" decoding="async">'
+            '</img> and <img src="/missing.png" alt="x" loading="lazy" decoding="async"></img></p></div>',
+        )
+
+    def test_stamp_changes_with_image(self):
+        md = "# T\n\n![alt](/images/a.png)"
+        before = render_variant(md, images=self.sizer)
+        digest = images_digest(self.static)
+        self.assertEqual(render_variant("no images", images=self.sizer), "\0img\0")
+        write(os.path.join(self.static, "images", "a.png"), png_bytes(400, 200) + b"\x00")
+        self.assertNotEqual(render_variant(md, images=self.sizer), before)
+        self.assertNotEqual(images_digest(self.static), digest)
+
+    def test_document_cache_keeps_variants_apart(self):
+        md = "# T\n\n![alt](/images/a.png)"
+        cache = DocumentCache(os.path.join(self.tmp.name, "cache"))
+        self.assertNotEqual(cache.key(md, render_variant(md)), cache.key(md, render_variant(md, images=self.sizer)))
+
+
+if __name__ == "__main__":
+    unittest.main()
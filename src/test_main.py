@@ -0,0 +1,215 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import main
+from main import BuildOptions, generate_pages, parse_args, rebuild_changed
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.template = os.path.join(self.dir, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.options = BuildOptions(self.template)
+        self.pages = []
+        for i in range(4):
+            src = os.path.join(self.dir, f"page{i}.md")
+            with open(src, "w") as f:
+                f.write(f"# Page {i}\n\nSome **bold** text {i}")
+            self.pages.append((src, [("/", os.path.join(self.dir, "out", f"page{i}.html"))]))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_outputs(self):
+        outputs = []
+        for _, [(_, dest)] in self.pages:
+            with open(dest) as f:
+                outputs.append(f.read())
+        return outputs
+
+    def test_parallel_matches_sequential(self):
+        sequential, failures = generate_pages(self.pages, self.options, jobs=1)
+        self.assertEqual(failures, [])
+        expected = self.read_outputs()
+
+        parallel, failures = generate_pages(self.pages, self.options, jobs=2)
+        self.assertEqual(failures, [])
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(list(parallel), [src for src, _ in self.pages])
+        self.assertEqual(self.read_outputs(), expected)
+
+    def test_pipeline_matches_sequential(self):
+        sequential, _ = generate_pages(self.pages, self.options, jobs=1)
+        expected = self.read_outputs()
+        for jobs in (1, 2):
+            results, failures = generate_pages(self.pages, self.options, jobs=jobs, pipeline=True, queue_size=1)
+            self.assertEqual(failures, [])
+            self.assertEqual(results, sequential)
+            self.assertEqual(self.read_outputs(), expected)
+
+    def test_several_targets_from_one_parse(self):
+        src, _ = self.pages[0]
+        with open(src, "a") as f:
+            f.write("\n\n[home](/) ![a](/a.png)")
+        targets = [("/", os.path.join(self.dir, "root.html")), ("/base/", os.path.join(self.dir, "base.html"))]
+        results, failures = generate_pages([(src, targets)], self.options, jobs=1)
+        self.assertEqual(failures, [])
+        self.assertEqual(len(results[src]), 2)
+        with open(targets[0][1]) as f:
+            self.assertIn('<a href="/">home</a>', f.read())
+        with open(targets[1][1]) as f:
+            self.assertIn('<a href="/base/">home</a> <img src="/base/a.png"', f.read())
+
+    def test_failure_names_source_file(self):
+        bad = os.path.join(self.dir, "bad.md")
+        with open(bad, "w") as f:
+            f.write("no title here")
+        pages = self.pages + [(bad, [("/", os.path.join(self.dir, "out", "bad.html"))])]
+
+        results, failures = generate_pages(pages, self.options, jobs=2)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0].from_path, bad)
+        self.assertIn(bad, str(failures[0]))
+
+
+class TestRebuildChanged(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs("content/blog")
+        os.makedirs("static")
+        with open("static/index.css", "w") as f:
+            f.write("body {}")
+        with open("template.html", "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        with open("content/index.md", "w") as f:
+            f.write("# Home")
+        with open("content/blog/post.md", "w") as f:
+            f.write("# Post")
+        self.args = parse_args([])
+        self.manifests, failures = main.build(self.args, 1)
+        self.assertEqual(failures, [])
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def mtime(self, path):
+        return os.stat(path).st_mtime_ns
+
+    def test_markdown_edit_rebuilds_one_page(self):
+        home = self.mtime("docs/index.html")
+        with open("content/blog/post.md", "w") as f:
+            f.write("# Edited")
+        rebuild_changed({"content/blog/post.md"}, self.manifests, self.args, 1)
+        with open("docs/blog/post.html") as f:
+            self.assertIn("Edited", f.read())
+        self.assertEqual(self.mtime("docs/index.html"), home)
+
+    def test_removed_source_removes_output(self):
+        os.remove("content/blog/post.md")
+        rebuild_changed({"content/blog/post.md"}, self.manifests, self.args, 1)
+        self.assertFalse(os.path.exists("docs/blog/post.html"))
+        self.assertNotIn(os.path.join("content", "blog", "post.md"), self.manifests[0].entries)
+
+    def test_template_change_rebuilds_all_pages(self):
+        with open("template.html", "w") as f:
+            f.write("<h1>{{ Title }}</h1>{{ Content }}")
+        rebuild_changed({"template.html"}, self.manifests, self.args, 1)
+        for page in ("docs/index.html", "docs/blog/post.html"):
+            with open(page) as f:
+                self.assertTrue(f.read().startswith("<h1>"))
+
+    def test_targets_build_each_output_dir(self):
+        args = parse_args(["--target", "/=site/root", "--target", "/base/=site/base"])
+        manifests, failures = main.build(args, 1)
+        self.assertEqual(failures, [])
+        self.assertEqual(len(manifests), 2)
+        self.assertTrue(os.path.isfile("site/base/index.css"))
+        with open("site/base/blog/post.html") as f:
+            self.assertIn("Post", f.read())
+        _, failures = main.build(args, 1)
+        self.assertEqual(failures, [])
+        self.assertTrue(os.path.isfile(main.manifest_path("site/base")))
+
+    def test_overlapping_targets_are_rejected(self):
+        for targets in (["/=site", "/preview/=site/preview"], ["/=site", "/base/=site/"]):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                parse_args([arg for target in targets for arg in ("--target", target)])
+        self.assertEqual(len(parse_args(["--target", "/=site", "--target", "/p/=site-preview"]).target), 2)
+
+    def test_full_build_leaves_identical_outputs_alone(self):
+        home = self.mtime("docs/index.html")
+        with open("content/blog/post.md", "w") as f:
+            f.write("# Edited")
+        args = parse_args(["--full", "--changed-list", "changed.txt"])
+        _, failures = main.build(args, 1)
+        self.assertEqual(failures, [])
+        self.assertEqual(self.mtime("docs/index.html"), home)
+        with open("changed.txt") as f:
+            self.assertEqual(f.read().splitlines(), [os.path.join("docs", "blog", "post.html")])
+        self.assertEqual([name for name in os.listdir("docs/blog") if name.endswith(".tmp")], [])
+
+    def test_build_writes_deploy_manifest(self):
+        with open("content/blog/post.md", "w") as f:
+            f.write("# Edited")
+        with open("content/new.md", "w") as f:
+            f.write("# New")
+        os.remove("static/index.css")
+        _, failures = main.build(self.args, 1)
+        self.assertEqual(failures, [])
+        with open(main.deploy_manifest_path("docs")) as f:
+            deploy = json.load(f)
+        self.assertEqual(
+            [(entry["path"], entry["status"]) for entry in deploy["files"]],
+            [("blog/post.html", "modified"), ("new.html", "added")],
+        )
+        self.assertEqual(deploy["files"][1]["size"], os.path.getsize("docs/new.html"))
+        self.assertEqual(deploy["deleted"], ["index.css"])
+
+    def test_deploy_manifest_sees_edits_through_hardlinks(self):
+        shutil.rmtree("docs")
+        main.build(parse_args(["--link-static", "--full"]), 1)
+        self.assertTrue(os.path.samefile("static/index.css", "docs/index.css"))
+        with open("static/index.css", "a") as f:
+            f.write("p {}")
+        main.build(parse_args(["--link-static", "--changed-list", "changed.txt"]), 1)
+        with open(main.deploy_manifest_path("docs")) as f:
+            deploy = json.load(f)
+        self.assertEqual([(entry["path"], entry["status"]) for entry in deploy["files"]], [("index.css", "modified")])
+        with open("changed.txt") as f:
+            self.assertEqual(f.read().splitlines(), [os.path.join("docs", "index.css")])
+
+    def test_search_index_follows_pages(self):
+        args = parse_args(["--search-index"])
+        main.build(args, 1)
+        with open("docs/search/index.json") as f:
+            self.assertEqual(json.load(f)["pages"], [["blog/post.html", "Post"], ["index.html", "Home"]])
+        os.remove("content/blog/post.md")
+        _, failures = main.build(args, 1)
+        self.assertEqual(failures, [])
+        with open("docs/search/index.json") as f:
+            self.assertEqual(json.load(f)["pages"], [["index.html", "Home"]])
+        self.assertEqual(sorted(os.listdir("docs/search")), ["index.json", "shard-ho.json"])
+
+    def test_static_change_copies_one_file(self):
+        with open("static/new.css", "w") as f:
+            f.write("p {}")
+        os.remove("static/index.css")
+        rebuild_changed({"static/new.css", "static/index.css"}, self.manifests, self.args, 1)
+        self.assertTrue(os.path.isfile("docs/new.css"))
+        self.assertFalse(os.path.exists("docs/index.css"))
+
+
+if __name__ == "__main__":
+    unittest.main()
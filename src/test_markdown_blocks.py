@@ -1,6 +1,9 @@
+import io
+import mmap
+import tempfile
 import unittest
 
-from markdown_blocks import markdown_to_blocks, block_to_block_type, BlockType
+from markdown_blocks import markdown_to_blocks, block_to_block_type, BlockType, iter_blocks, markdown_to_html_node, classify_block, iter_markdown_html
 
 
 class TestMarkdownBlocks(unittest.TestCase):
@@ -138,5 +141,68 @@ This is the same paragraph on a new line
         md = "> This is a quote\nThis is not a quote.\n> Another quote line."
         self.assertEqual(block_to_block_type(md), BlockType.PARAGRAPH)
 
+class TestClassifyBlock(unittest.TestCase):
+    def test_list_offsets_skip_markers(self):
+        btype, lines, offsets = classify_block("- one\n  - two")
+        self.assertEqual(btype, BlockType.UNORDERED_LIST)
+        self.assertEqual([ln[o:] for ln, o in zip(lines, offsets)], ["one", "two"])
+
+        btype, lines, offsets = classify_block("1. a\n2. b\n3. c")
+        self.assertEqual(btype, BlockType.ORDERED_LIST)
+        self.assertEqual([ln[o:] for ln, o in zip(lines, offsets)], ["a", "b", "c"])
+
+    def test_quote_offsets_skip_marker_and_spaces(self):
+        btype, lines, offsets = classify_block(">   quoted\n>more")
+        self.assertEqual(btype, BlockType.QUOTE)
+        self.assertEqual([ln[o:] for ln, o in zip(lines, offsets)], ["quoted", "more"])
+
+    def test_heading_offset(self):
+        btype, lines, offsets = classify_block("###  Title\nbody")
+        self.assertEqual(btype, BlockType.HEADING)
+        self.assertEqual(lines[0][offsets[0]:], "Title")
+
+    def test_paragraph_and_code_have_no_offsets(self):
+        self.assertEqual(classify_block("plain text")[2], None)
+        self.assertEqual(classify_block("```\ncode\n```")[0], BlockType.CODE)
+        self.assertEqual(classify_block("```\ncode\n```")[2], None)
+
+    def test_near_misses_are_paragraphs(self):
+        for block in ("####### seven", "-no space", "2. starts at two", "1. a\n3. b", "```only", "> a\nb"):
+            self.assertEqual(classify_block(block)[0], BlockType.PARAGRAPH, block)
+
+class TestIterBlocks(unittest.TestCase):
+    DOC = "# Title\n\n\n\nFirst para\nline two  \n\n- a\n- b\n  \nstill list?\n\n```\ncode\n```\n"
+
+    def test_matches_markdown_to_blocks_for_strings(self):
+        self.assertEqual(list(iter_blocks(self.DOC)), markdown_to_blocks(self.DOC))
+        self.assertEqual(list(iter_blocks("")), [])
+
+    def test_file_objects_and_mmap(self):
+        expected = markdown_to_blocks(self.DOC)
+        self.assertEqual(list(iter_blocks(io.StringIO(self.DOC))), expected)
+        self.assertEqual(list(iter_blocks(io.BytesIO(self.DOC.encode()))), expected)
+        with tempfile.TemporaryFile() as f:
+            f.write(self.DOC.replace("\n", "\r\n").encode())
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self.assertEqual(list(iter_blocks(mm)), expected)
+
+    def test_is_lazy(self):
+        blocks = iter_blocks(io.StringIO("one\n\ntwo"))
+        self.assertEqual(next(blocks), "one")
+
+    def test_markdown_to_html_node_from_file(self):
+        self.assertEqual(
+            markdown_to_html_node(io.BytesIO(self.DOC.encode())).to_html(),
+            markdown_to_html_node(self.DOC).to_html(),
+        )
+
+    def test_iter_markdown_html_streams_blocks(self):
+        html = iter_markdown_html(io.StringIO(self.DOC + "\n[home](/)"), "/base/")
+        self.assertEqual(next(html), "<div>")
+        self.assertEqual(next(html), "<h1>")
+        self.assertEqual("<div>" + "<h1>" + "".join(html), markdown_to_html_node(self.DOC + "\n[home](/)").to_html("/base/"))
+        self.assertEqual("".join(iter_markdown_html("")), "<div></div>")
+
 if __name__ == "__main__":
     unittest.main()
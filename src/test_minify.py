@@ -0,0 +1,59 @@
+import unittest
+
+from fragment_cache import FragmentCache
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node
+from minify import minify_html, minify_tree
+from page_template import CompiledTemplate
+
+
+class TestMinifyHTML(unittest.TestCase):
+    def test_template(self):
+        text = (
+            '<!doctype html>\n<html>\n  <head>\n    <!-- styles -->\n'
+            '    <link href="/index.css" rel="stylesheet" />\n    <title>{{ Title }}</title>\n  </head>\n'
+            '  <body class="a b">\n    <article>{{ Content }}</article>\n'
+            '    <pre>  keep\n    this  </pre>\n    <span>a</span> <span>b</span>\n  </body>\n</html>\n'
+        )
+        self.assertEqual(
+            minify_html(text),
+            '<!doctype html><html><head><link href="/index.css" rel=stylesheet /><title>{{ Title }}</title>'
+            '</head><body class="a b"><article>{{ Content }}</article><pre>  keep\n    this  </pre>'
+            '<span>a</span> <span>b</span></body></html>',
+        )
+
+    def test_conditional_comments_are_kept(self):
+        self.assertEqual(minify_html("<p>a</p>\n<!--[if IE]>x<![endif]-->"), "<p>a</p><!--[if IE]>x<![endif]-->")
+
+    def test_compiled_template_keeps_slots(self):
+        base = CompiledTemplate("<html>\n  <title>{{ Title }}</title>\n</html>")
+        self.assertEqual(base.minified().render(Title="T"), "<html><title>T</title></html>")
+        self.assertIs(base.minified(), base.minified())
+
+
+class TestMinifyTree(unittest.TestCase):
+    def test_text_and_attributes(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "a   b <!-- note --> c"), LeafNode("img", "", {"src": "/a.png", "alt": "x"})]),
+            ParentNode("pre", [LeafNode("code", "keep   <!-- this -->\n")], {"class": "code"}),
+            LeafNode("code", "inline   code"),
+        ], {"id": "main"})
+        self.assertEqual(
+            minify_tree(node).to_html(),
+            '<div id=main><p>a b c<img src="/a.png" alt=x></img></p>'
+            '<pre class=code><code>keep   <!-- this -->\n</code></pre><code>inline   code</code></div>',
+        )
+
+    def test_cached_blocks_are_kept_apart(self):
+        md = "# T\n\nsome   spaced   text"
+        cache = FragmentCache()
+        plain = markdown_to_html_node(md, cache).to_html()
+        minified = markdown_to_html_node(md, cache, minify=True).to_html()
+        self.assertEqual(plain, "<div><h1>T</h1><p>some   spaced   text</p></div>")
+        self.assertEqual(minified, "<div><h1>T</h1><p>some spaced text</p></div>")
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(markdown_to_html_node(md, cache, minify=True).to_html(), minified)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import io
+import os
+import tempfile
+import unittest
+
+from page_template import CompiledTemplate, load_template
+
+
+class TestCompiledTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        tpl = CompiledTemplate("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(tpl.chunks, ["<title>", "</title><body>", "</body>"])
+        self.assertEqual(tpl.slot_names, ["Title", "Content"])
+        self.assertEqual(
+            tpl.render(Title="Hi", Content="<p>x</p>"),
+            "<title>Hi</title><body><p>x</p></body>",
+        )
+
+    def test_repeated_slot(self):
+        tpl = CompiledTemplate("{{ Title }} - {{ Title }}")
+        self.assertEqual(tpl.render(Title="A"), "A - A")
+
+    def test_unknown_placeholder_is_static(self):
+        tpl = CompiledTemplate("{{ Other }}{{ Content }}")
+        self.assertEqual(tpl.render(Content="c"), "{{ Other }}c")
+
+    def test_no_slots(self):
+        tpl = CompiledTemplate("<html></html>")
+        self.assertEqual(tpl.render(Title="x"), "<html></html>")
+
+    def test_iter_render_bytes_matches_render(self):
+        tpl = CompiledTemplate("<title>{{ Title }}</title>{{ Content }}")
+        values = {"Title": "Glorfindel é", "Content": "<p>ü</p>"}
+        self.assertEqual(b"".join(tpl.iter_render_bytes(**values)), tpl.render(**values).encode("utf-8"))
+        streamed = tpl.iter_render_bytes(Title="T", Content=iter(["<p>", "ü", "</p>"]))
+        self.assertEqual(list(streamed), [b"<title>", b"T", b"</title>", b"<p>", "ü".encode(), b"</p>"])
+
+    def test_iter_render_streams_iterables(self):
+        tpl = CompiledTemplate("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        fragments = list(tpl.iter_render(Title="T", Content=iter(["<p>", "a", "</p>"])))
+        self.assertEqual(fragments, ["<title>", "T", "</title><body>", "<p>", "a", "</p>", "</body>"])
+
+    def test_write(self):
+        tpl = CompiledTemplate("[{{ Content }}]")
+        out = io.StringIO()
+        tpl.write(out, Content=["a", "b"])
+        self.assertEqual(out.getvalue(), "[ab]")
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_cached_until_file_changes(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "template.html")
+            with open(path, "w") as f:
+                f.write("a {{ Content }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+
+            with open(path, "w") as f:
+                f.write("bb {{ Content }}")
+            self.assertEqual(load_template(path).render(Content="x"), "bb x")
+
+
+if __name__ == "__main__":
+    unittest.main()
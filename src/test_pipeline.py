@@ -0,0 +1,56 @@
+import threading
+import time
+import unittest
+
+from pipeline import run_pipeline
+
+
+def double(value):
+    return value * 2
+
+
+class TestRunPipeline(unittest.TestCase):
+    def test_keeps_order_and_isolates_failures(self):
+        def read(item):
+            if item == 3:
+                raise OSError("unreadable")
+            time.sleep(0.001 * (item % 3))
+            return item
+
+        def write(rendered):
+            if rendered == 8:
+                raise ValueError("disk full")
+            return f"wrote {rendered}"
+
+        outcomes = run_pipeline([(i, i) for i in range(6)], read, double, write, jobs=2)
+        self.assertEqual([key for key, _ in outcomes], list(range(6)))
+        self.assertEqual(outcomes[0][1], "wrote 0")
+        self.assertEqual(outcomes[5][1], "wrote 10")
+        self.assertIsInstance(outcomes[3][1], OSError)
+        self.assertIsInstance(outcomes[4][1], ValueError)
+
+    def test_bounded_queues_limit_read_ahead(self):
+        lock = threading.Lock()
+        counts = {"read": 0, "rendered": 0, "ahead": 0}
+
+        def read(item):
+            with lock:
+                counts["read"] += 1
+                counts["ahead"] = max(counts["ahead"], counts["read"] - counts["rendered"])
+            return item
+
+        def render(value):
+            time.sleep(0.002)
+            with lock:
+                counts["rendered"] += 1
+            return value
+
+        outcomes = run_pipeline([(i, i) for i in range(30)], read, render, lambda rendered: rendered,
+                                readers=2, writers=1, queue_size=1)
+        self.assertEqual([outcome for _, outcome in outcomes], list(range(30)))
+        # one page rendering, one queued and one held by each reader
+        self.assertLessEqual(counts["ahead"], 1 + 1 + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+import main
+from copy_directory import sync_directory
+from png_optimize import optimize_png, optimize_pngs, read_chunks
+
+
+def chunk(chunk_type, body):
+    return struct.pack(">I", len(body)) + chunk_type + body + struct.pack(">I", zlib.crc32(chunk_type + body))
+
+
+def png_bytes(width=64, height=64, extra=()):
+    """A gray 8-bit PNG of vertical stripes, deflated at level 0 and split over two IDAT chunks."""
+    raw = b"".join(b"\x00" + bytes((x * 4) % 256 for x in range(width)) for _ in range(height))
+    data = zlib.compress(raw, 0)
+    half = len(data) // 2
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + b"".join(chunk(chunk_type, body) for chunk_type, body in extra)
+        + chunk(b"IDAT", data[:half]) + chunk(b"IDAT", data[half:])
+        + chunk(b"IEND", b"")
+    )
+
+
+def pixels(data):
+    return zlib.decompress(b"".join(body for chunk_type, body in read_chunks(data) if chunk_type == b"IDAT"))
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class TestOptimizePNG(unittest.TestCase):
+    def test_recompresses_and_strips_metadata_chunks(self):
+        original = png_bytes(extra=[
+            (b"sRGB", b"\x00"), (b"gAMA", struct.pack(">I", 45455)), (b"tEXt", b"Comment\x00hello"),
+            (b"tIME", b"\x07\xea\x01\x01\x00\x00\x00"), (b"pHYs", struct.pack(">IIB", 2835, 2835, 1)),
+            (b"tRNS", b"\x00\x10"),
+        ])
+        optimized = optimize_png(original)
+        self.assertLess(len(optimized), len(original))
+        self.assertEqual([t for t, _ in read_chunks(optimized)], [b"IHDR", b"sRGB", b"gAMA", b"tRNS", b"IDAT", b"IEND"])
+        self.assertEqual(pixels(optimized), pixels(original))
+        self.assertIs(optimize_png(optimized), optimized)
+
+    def test_leaves_other_files_alone(self):
+        for data in (b"not a png", png_bytes()[:-3], png_bytes(extra=[(b"acTL", b"\x00" * 8)])):
+            self.assertIs(optimize_png(data), data)
+
+    def test_read_chunks_checks_crc(self):
+        data = bytearray(png_bytes())
+        data[30] ^= 0xFF
+        with self.assertRaises(ValueError):
+            read_chunks(bytes(data))
+
+
+class TestOptimizePNGs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.cache = os.path.join(self.tmp.name, "cache")
+        write(os.path.join(self.static, "images", "a.png"), png_bytes())
+        write(os.path.join(self.static, "images", "b.png"), optimize_png(png_bytes(32, 32)))
+        write(os.path.join(self.static, "index.css"), b"body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_caches_results_by_content(self):
+        first = optimize_pngs(self.static, cache_dir=self.cache)
+        a = os.path.join("images", "a.png")
+        self.assertEqual(first["optimized"], [a, os.path.join("images", "b.png")])
+        self.assertEqual(list(first["replacements"]), [a])
+        self.assertGreater(first["saved"], 0)
+        second = optimize_pngs(self.static, jobs=2, cache_dir=self.cache)
+        self.assertEqual((second["optimized"], second["cached"]), ([], 2))
+        self.assertEqual(second["replacements"], first["replacements"])
+
+    def test_sync_ships_replacements(self):
+        replacements = optimize_pngs(self.static, cache_dir=self.cache)["replacements"]
+        out = os.path.join(self.tmp.name, "docs")
+        sync_directory(self.static, out, replacements=replacements)
+        with open(os.path.join(out, "images", "a.png"), "rb") as f:
+            self.assertEqual(f.read(), optimize_png(png_bytes()))
+        result = sync_directory(self.static, out, replacements=replacements)
+        self.assertEqual(result["copied"], [])
+
+
+class TestFingerprintedPNGs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        write(os.path.join("static", "a.png"), png_bytes())
+        write(os.path.join("content", "index.md"), b"# Home\n\n![a](/a.png)")
+        with open("template.html", "w") as f:
+            f.write("{{ Title }}{{ Content }}")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def shipped(self):
+        with open(os.path.join("docs", "index.html")) as f:
+            name = f.read().split('src="/')[1].split('"')[0]
+        with open(os.path.join("docs", name), "rb") as f:
+            return f.read()
+
+    def test_fingerprint_names_the_optimized_bytes(self):
+        main.build(main.parse_args(["--fingerprint"]), 1)
+        self.assertEqual(self.shipped(), png_bytes())
+        main.build(main.parse_args(["--fingerprint", "--optimize-images"]), 1)
+        self.assertEqual(self.shipped(), optimize_png(png_bytes()))
+
+
+if __name__ == "__main__":
+    unittest.main()
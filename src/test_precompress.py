@@ -0,0 +1,93 @@
+import gzip
+import os
+import tempfile
+import threading
+import unittest
+import urllib.request
+from functools import partial
+from http.server import ThreadingHTTPServer
+
+from dev_server import PrecompressedHandler, accepted_encodings
+from precompress import precompress_directory
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class TestPrecompressDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = os.path.join(self.tmp.name, "docs")
+        self.state = os.path.join(self.tmp.name, "state.json")
+        self.page = os.path.join(self.out, "index.html")
+        write(self.page, b"<p>hello hello hello hello hello hello</p>" * 20)
+        write(os.path.join(self.out, "images", "a.png"), b"\x89PNG not compressible")
+        write(os.path.join(self.out, "archive.txt.gz"), b"shipped as is")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_precompress(self, jobs=1):
+        return precompress_directory(self.out, jobs, use_zstd=False, state_path=self.state)
+
+    def test_writes_gzip_sidecars_for_text_only(self):
+        result = self.run_precompress()
+        self.assertEqual(result["compressed"], [self.page])
+        with open(self.page, "rb") as f, gzip.open(self.page + ".gz") as g:
+            self.assertEqual(g.read(), f.read())
+        self.assertFalse(os.path.exists(os.path.join(self.out, "images", "a.png.gz")))
+
+    def test_skips_unchanged_and_redoes_changed(self):
+        self.run_precompress()
+        self.assertEqual(self.run_precompress()["unchanged"], 1)
+        write(self.page, b"<p>changed changed changed changed changed</p>" * 20)
+        self.assertEqual(self.run_precompress(jobs=2)["compressed"], [self.page])
+        with gzip.open(self.page + ".gz") as g:
+            self.assertTrue(g.read().startswith(b"<p>changed"))
+
+    def test_removes_own_stale_sidecars_only(self):
+        self.run_precompress()
+        os.remove(self.page)
+        result = self.run_precompress()
+        self.assertEqual(result["removed"], [self.page + ".gz"])
+        self.assertTrue(os.path.exists(os.path.join(self.out, "archive.txt.gz")))
+
+
+class QuietHandler(PrecompressedHandler):
+    def log_message(self, *args):
+        pass
+
+
+class TestDevServer(unittest.TestCase):
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings("gzip, deflate;q=0.5, zstd;q=0, br"), {"gzip", "deflate", "br"})
+        self.assertEqual(accepted_encodings(None), set())
+
+    def test_serves_sidecar_when_accepted(self):
+        with tempfile.TemporaryDirectory() as d:
+            write(os.path.join(d, "index.html"), b"plain")
+            write(os.path.join(d, "index.html.gz"), gzip.compress(b"plain"))
+            handler = partial(QuietHandler, directory=d)
+            server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                url = f"http://127.0.0.1:{server.server_address[1]}/"
+                request = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+                with urllib.request.urlopen(request) as response:
+                    self.assertEqual(response.headers["Content-Encoding"], "gzip")
+                    self.assertEqual(response.headers["Content-Type"], "text/html")
+                    self.assertEqual(gzip.decompress(response.read()), b"plain")
+                with urllib.request.urlopen(url + "index.html") as response:
+                    self.assertIsNone(response.headers["Content-Encoding"])
+                    self.assertEqual(response.read(), b"plain")
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
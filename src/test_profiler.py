@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import unittest
+
+from generation_tools import generate_page, render_page_targets, write_page
+from profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_span_records_page_and_stage(self):
+        profiler = Profiler()
+        with profiler.span("parse", "a.md"):
+            [object() for _ in range(10)]
+        with profiler.span("copy_static"):
+            pass
+        self.assertEqual([e["name"] for e in profiler.events], ["parse", "copy_static"])
+        self.assertEqual(list(profiler.page_totals()), ["a.md"])
+        self.assertEqual(profiler.stage_totals()["parse"]["count"], 1)
+        self.assertEqual(profiler.events[0]["peak_bytes"], 0)
+
+    def test_trace_memory_records_peak_and_net_bytes(self):
+        profiler = Profiler(trace_memory=True)
+        try:
+            with profiler.span("build"):
+                with profiler.span("parse", "a.md"):
+                    garbage = bytearray(1 << 20)
+                    del garbage
+                kept = bytearray(1 << 19)
+        finally:
+            profiler.close()
+        parse, build = profiler.events
+        self.assertGreaterEqual(parse["peak_bytes"], 1 << 20)
+        self.assertLess(parse["net_bytes"], 1 << 16)
+        self.assertGreaterEqual(build["peak_bytes"], 1 << 20)
+        self.assertGreaterEqual(build["net_bytes"], 1 << 19)
+        self.assertEqual(profiler.stage_totals()["parse"]["peak_bytes"], parse["peak_bytes"])
+        self.assertIn("KiB peak", profiler.format_summary())
+        del kept
+
+    def test_slowest_pages_sorted_by_total(self):
+        profiler = Profiler()
+        profiler.record("parse", profiler.origin_ns, 5, "fast.md")
+        profiler.record("parse", profiler.origin_ns, 50, "slow.md")
+        profiler.record("write", profiler.origin_ns, 10, "fast.md")
+        self.assertEqual([page for page, _ in profiler.slowest_pages(2)], ["slow.md", "fast.md"])
+        self.assertEqual([page for page, _ in profiler.slowest_pages(1)], ["slow.md"])
+
+    def test_generate_page_stages_and_exports(self):
+        with tempfile.TemporaryDirectory() as d:
+            src = os.path.join(d, "index.md")
+            tpl = os.path.join(d, "template.html")
+            with open(src, "w") as f:
+                f.write("# Title\n\nSome *text*")
+            with open(tpl, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+
+            profiler = Profiler()
+            generate_page(src, tpl, os.path.join(d, "out.html"), profiler=profiler)
+            self.assertEqual(
+                [e["name"] for e in profiler.events],
+                ["template", "read", "parse", "render", "write"],
+            )
+
+            profiler.write_json(os.path.join(d, "profile.json"))
+            profiler.write_chrome_trace(os.path.join(d, "profile.trace.json"))
+            with open(os.path.join(d, "profile.trace.json")) as f:
+                trace = json.load(f)
+            self.assertEqual(len(trace["traceEvents"]), 5)
+            self.assertTrue(all(e["ph"] == "X" for e in trace["traceEvents"]))
+            with open(os.path.join(d, "profile.json")) as f:
+                self.assertIn(src, json.load(f)["pages"])
+            self.assertIn(src, profiler.format_summary())
+
+            profiler = Profiler()
+            for dest, page in render_page_targets(src, "# Title", tpl, [("/", os.path.join(d, "out.html"))],
+                                                 profiler=profiler):
+                write_page(dest, page, profiler, src)
+            self.assertEqual([e["name"] for e in profiler.events], ["template", "parse", "render", "write"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import unittest
+
+from fragment_cache import FragmentCache
+from markdown_blocks import markdown_to_html_node
+from search_index import build_index, page_terms, shard_name, write_search_index
+
+
+class TestSearchIndex(unittest.TestCase):
+    def test_page_terms_keep_positions(self):
+        self.assertEqual(
+            page_terms(["Tom Bombadil, a", "mistake? TOM!"]),
+            {"tom": [0, 4], "bombadil": [1], "mistake": [3]},
+        )
+
+    def test_build_index_shards_by_prefix(self):
+        index, shards = build_index([
+            ("b.html", "B", {"tolkien": [0], "élan": [2]}),
+            ("a.html", "A", {"tom": [3, 5], "tolkien": [1]}),
+        ], "/base/")
+        self.assertEqual(index["pages"], [["a.html", "A"], ["b.html", "B"]])
+        self.assertEqual(index["basepath"], "/base/")
+        self.assertEqual(index["shards"], {"to": "shard-to.json", "él": shard_name("él")})
+        self.assertEqual(shards["shard-to.json"], {"tolkien": [[0, [1]], [1, [0]]], "tom": [[0, [3, 5]]]})
+        self.assertEqual(shard_name("él"), "shard-x" + "él".encode("utf-8").hex() + ".json")
+
+    def test_markdown_text_survives_cache_hits(self):
+        md = "# Title\n\nSome **bold** [link](/a) text\n\n```\ncode is not indexed\n```"
+        cache = FragmentCache()
+        first, second = [], []
+        markdown_to_html_node(md, cache, search_text=first)
+        markdown_to_html_node(md, cache, search_text=second)
+        self.assertEqual(first, ["Title", "Some ", "bold", " ", "link", " text"])
+        self.assertEqual(second, first)
+        self.assertEqual(cache.hits, 3)  # the text lookups are not counted
+
+
+class TestWriteSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_changes_and_removes_stale_shards(self):
+        pages = [("index.html", "Home", {"hobbit": [0], "tom": [1]})]
+        result = write_search_index(self.out, pages)
+        search = os.path.join(self.out, "search")
+        self.assertEqual(sorted(os.listdir(search)), ["index.json", "shard-ho.json", "shard-to.json"])
+        self.assertEqual(set(result["files"].values()), {"added"})
+        self.assertEqual(write_search_index(self.out, pages)["files"], {})
+
+        result = write_search_index(self.out, [("index.html", "Home", {"hobbit": [0]})])
+        self.assertEqual(result["deleted"], [os.path.join(search, "shard-to.json")])
+        self.assertEqual(result["files"], {os.path.join(search, "index.json"): "modified"})
+        with open(os.path.join(search, "shard-ho.json")) as f:
+            self.assertEqual(json.load(f), {"hobbit": [[0, [0]]]})
+
+
+if __name__ == "__main__":
+    unittest.main()
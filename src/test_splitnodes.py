@@ -450,5 +450,36 @@ class TestSplitNodes(unittest.TestCase):
         expected = []
         self.assertEqual(result, expected)
 
+    def test_text_to_text_node_code_span_keeps_delimiters(self):
+        text = "Use `a**b*_c` here **now**"
+        result = text_to_text_node(text)
+        expected = [
+            TextNode("Use ", TextType.PLAIN),
+            TextNode("a**b*_c", TextType.CODE_TEXT),
+            TextNode(" here ", TextType.PLAIN),
+            TextNode("now", TextType.BOLD),
+        ]
+        self.assertEqual(result, expected)
+
+    def test_text_to_text_node_underscore_in_url(self):
+        text = "See [docs](http://x.com/a_b_c) and _this_"
+        result = text_to_text_node(text)
+        expected = [
+            TextNode("See ", TextType.PLAIN),
+            TextNode("docs", TextType.LINKS, "http://x.com/a_b_c"),
+            TextNode(" and ", TextType.PLAIN),
+            TextNode("this", TextType.ITALIC),
+        ]
+        self.assertEqual(result, expected)
+
+    def test_text_to_text_node_adjacent_italics(self):
+        result = text_to_text_node("*a**b*")
+        expected = [TextNode("a", TextType.ITALIC), TextNode("b", TextType.ITALIC)]
+        self.assertEqual(result, expected)
+
+    def test_text_to_text_node_unclosed_raises(self):
+        with self.assertRaises(ValueError):
+            text_to_text_node("an **unclosed bold")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import time
+import unittest
+
+from watcher import InotifyWatcher, PollingWatcher, watch
+
+
+class FakeWatcher:
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.closed = False
+
+    def read_changes(self, timeout=None):
+        if not self.batches:
+            raise KeyboardInterrupt
+        return self.batches.pop(0)
+
+    def close(self):
+        self.closed = True
+
+
+class TestPollingWatcher(unittest.TestCase):
+    def test_detects_add_modify_remove(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "a.md")
+            with open(path, "w") as f:
+                f.write("a")
+            watcher = PollingWatcher([d], interval=0.01)
+            self.assertEqual(watcher.read_changes(0), set())
+
+            with open(path, "w") as f:
+                f.write("changed")
+            new = os.path.join(d, "b.md")
+            with open(new, "w") as f:
+                f.write("b")
+            self.assertEqual(watcher.read_changes(1), {path, new})
+
+            os.remove(path)
+            self.assertEqual(watcher.read_changes(1), {path})
+
+
+class TestInotifyWatcher(unittest.TestCase):
+    def test_reports_files_in_subdirectories_and_file_roots(self):
+        with tempfile.TemporaryDirectory() as d:
+            content = os.path.join(d, "content")
+            os.makedirs(os.path.join(content, "blog"))
+            template = os.path.join(d, "template.html")
+            with open(template, "w") as f:
+                f.write("x")
+            try:
+                watcher = InotifyWatcher([content, template])
+            except OSError:
+                self.skipTest("inotify not available")
+            try:
+                post = os.path.join(content, "blog", "post.md")
+                with open(post, "w") as f:
+                    f.write("# Post")
+                with open(os.path.join(d, "unrelated.txt"), "w") as f:
+                    f.write("ignored")
+                with open(template, "w") as f:
+                    f.write("y")
+                time.sleep(0.05)
+                self.assertEqual(watcher.read_changes(1), {post, template})
+            finally:
+                watcher.close()
+
+
+class TestWatch(unittest.TestCase):
+    def test_debounces_bursts_into_one_callback(self):
+        fake = FakeWatcher([{"a"}, {"b"}, set(), {"c"}, set()])
+        calls = []
+        watch(["content"], calls.append, debounce=0, watcher=fake)
+        self.assertEqual(calls, [{"a", "b"}, {"c"}])
+        self.assertTrue(fake.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,6 +10,8 @@ class TextType(Enum):
     IMAGES = "images"
 
 class TextNode():
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType = TextType.PLAIN, url: str = None):
         self.text = text
         self.text_type = text_type
@@ -25,7 +27,12 @@ class TextNode():
     def __repr__(self):
         return f"TextNode({self.text!r}, {self.text_type}, {self.url!r})"
 
-def text_node_to_html_node(text_node: "TextNode") -> HTMLNode:
+def text_node_to_html_node(text_node: "TextNode", images=None) -> HTMLNode:
+    """
+    Converts a TextNode to the matching LeafNode. `images` is an optional
+    image_size.ImageSizer whose attributes (width, height, loading, ...)
+    are added to <img> tags.
+    """
     if text_node.text_type == TextType.LINKS:
         if text_node.url is None:
             raise ValueError("URL must be provided for link text nodes")
@@ -40,6 +47,9 @@ def text_node_to_html_node(text_node: "TextNode") -> HTMLNode:
         if text_node.url is None:
             raise ValueError("URL must be provided for image text nodes")
         # Use empty value for <img> since it's a void element; alt is provided in props
-        return LeafNode(tag="img", value="", props={"src": text_node.url, "alt": text_node.text})
+        props = {"src": text_node.url, "alt": text_node.text}
+        if images is not None:
+            props.update(images.props(text_node.url))
+        return LeafNode(tag="img", value="", props=props)
     else:  # Plain text
         return LeafNode(tag=None, value=text_node.text)
\ No newline at end of file
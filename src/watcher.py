@@ -0,0 +1,199 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+# inotify event bits (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+def _iter_files(root):
+    if os.path.isfile(root):
+        yield root
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            yield os.path.join(dirpath, filename)
+
+class PollingWatcher:
+    """
+    Portable watcher that detects changes by re-scanning the roots and
+    comparing (mtime, size) per file. Roots may be directories (watched
+    recursively) or single files.
+    """
+
+    def __init__(self, roots, interval: float = 0.25):
+        self.roots = list(roots)
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        for root in self.roots:
+            for path in _iter_files(root):
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def read_changes(self, timeout: float = None) -> set:
+        """
+        Returns the set of paths added, modified or removed since the last
+        call, waiting up to `timeout` seconds (forever if None) for one.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {
+                path for path in current.keys() | self.snapshot.keys()
+                if current.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = current
+            if changed:
+                return changed
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """
+    Linux watcher built on inotify through ctypes. Directory roots are
+    watched recursively (new subdirectories are picked up as they appear);
+    file roots are watched through their parent directory so editors that
+    save by renaming a temp file over the original are still seen.
+
+    Raises OSError if inotify is unavailable.
+    """
+
+    def __init__(self, roots):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = list(roots)
+        self.dirs = {}     # watch descriptor -> directory path
+        self.filters = {}  # watch descriptor -> file names of interest, or None for all
+        for root in self.roots:
+            if os.path.isdir(root):
+                self._watch_tree(root)
+            else:
+                self._add_watch(os.path.dirname(root) or ".", {os.path.basename(root)})
+
+    def _add_watch(self, path, names=None):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            return None
+        if wd in self.filters and (self.filters[wd] is None or names is None):
+            self.filters[wd] = None
+        elif wd in self.filters:
+            self.filters[wd] |= names
+        else:
+            self.filters[wd] = names
+        self.dirs[wd] = path
+        return wd
+
+    def _watch_tree(self, root):
+        for dirpath, dirnames, filenames in os.walk(root):
+            self._add_watch(dirpath)
+
+    def read_changes(self, timeout: float = None) -> set:
+        """
+        Returns the set of paths reported by inotify, waiting up to `timeout`
+        seconds (forever if None). A queue overflow reports the roots
+        themselves so the caller rescans them.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(self.roots)
+                    continue
+                if mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    self.filters.pop(wd, None)
+                    continue
+                directory = self.dirs.get(wd)
+                names = self.filters.get(wd)
+                if directory is None or (names is not None and name not in names):
+                    continue
+                path = os.path.join(directory, name) if name else directory
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    # a new directory: watch it and report what is already inside
+                    self._watch_tree(path)
+                    changed.update(_iter_files(path))
+                else:
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+def make_watcher(roots, poll_interval: float = 0.25):
+    """Returns an InotifyWatcher where supported, otherwise a PollingWatcher."""
+    try:
+        return InotifyWatcher(roots)
+    except (OSError, AttributeError):
+        return PollingWatcher(roots, poll_interval)
+
+def watch(roots, on_change, debounce: float = 0.1, watcher=None):
+    """
+    Calls `on_change(paths)` with the set of changed paths under `roots`
+    until interrupted. Events are debounced: after the first change, further
+    changes are collected until `debounce` seconds pass without any, so an
+    editor's save burst triggers a single rebuild.
+    """
+    watcher = watcher or make_watcher(roots)
+    print(f"Watching {', '.join(roots)} for changes ({type(watcher).__name__})...")
+    try:
+        while True:
+            changed = watcher.read_changes()
+            if not changed:
+                continue  # only events for paths nobody asked about
+            while True:
+                more = watcher.read_changes(debounce)
+                if not more:
+                    break
+                changed |= more
+            on_change(changed)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        watcher.close()